@@ -34,6 +34,8 @@ class UserProfile(AbstractUser):
     user_type = models.CharField(max_length=20, choices=UserType.choices, default=UserType.PUBLIC)
     profile_picture_url = models.TextField(blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
+    follower_count = models.PositiveIntegerField(default=0)  # desnormalizado (postsApp.Follow)
+    unread_notification_count = models.PositiveIntegerField(default=0)  # desnormalizado (postsApp.Notification)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
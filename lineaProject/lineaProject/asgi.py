@@ -12,5 +12,21 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lineaProject.settings')
+# Em ASGI o default de DB_CONN_MAX_AGE é 0 (ver DATABASES em settings.py)
+os.environ.setdefault('DJANGO_ASGI', '1')
 
-application = get_asgi_application()
+# Inicializa o Django antes de importar código que usa os models
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from postsApp.routing import websocket_urlpatterns  # noqa: E402
+
+# HTTP como antes; WebSockets (notificações) com a sessão do Django
+# Servir com: daphne lineaProject.asgi:application
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(websocket_urlpatterns))),
+})
@@ -0,0 +1,341 @@
+# lineaProject/cache.py
+# Cache em dois níveis (backend para CACHES, ver settings.py):
+#   1. LRU em memória do processo, limitado em nº de entradas e com um TTL
+#      curto (LOCAL_TIMEOUT) para não divergir muito dos outros processos;
+#   2. cache partilhada (outro alias de CACHES: ficheiros, Redis, ...).
+# get_or_compute() junta:
+#   - single-flight: vários misses simultâneos na mesma chave fazem um só
+#     cálculo (um lock por processo + um lock na cache partilhada: add(), ou
+#     um ficheiro criado com O_EXCL no FileBasedCache, cujo add() não é
+#     atómico);
+#   - stale-while-revalidate: depois de `timeout` o valor ainda é servido
+#     durante `stale_ttl` segundos enquanto é recalculado em background.
+# As métricas (hits locais/partilhados, misses, stale, cálculos, pedidos
+# coalescidos) são contadas por namespace (prefixo da chave até ':').
+# Com uma cache partilhada local ao processo (LocMemCache, a de omissão) cada
+# processo tem a sua cópia: o que um comando escreve não chega aos processos
+# web (ver shared_across_processes).
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def shared_across_processes(backend):
+    """False se o que é escrito em `backend` só é visto pelo próprio processo."""
+    if isinstance(backend, TieredCache):
+        backend = backend.shared
+    return not isinstance(backend, (LocMemCache, DummyCache))
+
+
+def namespace(key):
+    """'news:index:all:1' -> 'news'; 'template.cache.post_card.<hash>' -> 'template.cache.post_card'."""
+    if ':' in key:
+        return key.split(':', 1)[0]
+    return '.'.join(key.split('.')[:3])
+
+
+class LocalLRU:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # chave -> (valor em pickle, expira em)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            data, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(data)  # cópia: quem lê pode alterar o valor
+
+    def set(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (data, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheMetrics:
+    FIELDS = ('local_hits', 'shared_hits', 'misses', 'stale', 'computes', 'coalesced')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(Counter)
+
+    def incr(self, key, field):
+        with self._lock:
+            self._counts[namespace(key)][field] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {ns: {field: counts[field] for field in self.FIELDS} for ns, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+# Estado por processo (o Django cria uma instância do backend por thread)
+_locals = {}
+_metrics = {}
+_inflight = {}
+_state_lock = threading.Lock()
+_refresh_executor = None
+
+
+def _refresh_pool():
+    global _refresh_executor
+    with _state_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+    return _refresh_executor
+
+
+class TieredCache(BaseCache):
+    """
+    OPTIONS: SHARED (alias da cache partilhada), LOCAL_MAX_ENTRIES,
+    LOCAL_TIMEOUT (segundos no nível local) e LOCK_TIMEOUT (tempo máximo de
+    um cálculo, para o lock do single-flight).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._name = location or 'tiered'
+        self._shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        with _state_lock:
+            self._local = _locals.setdefault(self._name, LocalLRU(options.get('LOCAL_MAX_ENTRIES', 1000)))
+            self.metrics = _metrics.setdefault(self._name, CacheMetrics())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    # --- API de cache do Django ---
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self._local.get(local_key)
+        if value is not MISSING:
+            self.metrics.incr(key, 'local_hits')
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            self.metrics.incr(key, 'misses')
+            return default
+        self.metrics.incr(key, 'shared_hits')
+        self._local.set(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._set_local(key, value, timeout, version)
+
+    def _set_local(self, key, value, timeout, version):
+        local_key = self.make_and_validate_key(key, version=version)
+        local_timeout = self._local_timeout(timeout)
+        if local_timeout > 0:
+            self._local.set(local_key, value, local_timeout)
+        else:
+            self._local.delete(local_key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._set_local(key, value, timeout, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
+
+    # --- get_or_compute ---
+
+    def get_or_compute(self, key, compute, timeout=60, stale_ttl=0, version=None):
+        """
+        Devolve o valor em cache ou calcula-o com compute() (uma só vez por
+        chave, mesmo com muitos pedidos ao mesmo tempo). Durante `stale_ttl`
+        segundos depois de expirar, o valor antigo é devolvido e recalculado
+        em background.
+        """
+        entry = self.get(key, version=version)
+        if entry is not None:
+            value, fresh_until = entry
+            if time.time() < fresh_until:
+                return value
+            self.metrics.incr(key, 'stale')
+            self._refresh_in_background(key, compute, timeout, stale_ttl, version)
+            return value
+        return self._compute_once(key, compute, timeout, stale_ttl, version)
+
+    def _store(self, key, value, timeout, stale_ttl, version):
+        self.set(key, (value, time.time() + timeout), timeout + stale_ttl, version=version)
+
+    def _flight(self, key, version):
+        """(leader, evento): só o leader calcula a chave neste processo."""
+        flight_key = (self._name, self.make_and_validate_key(key, version=version))
+        with _state_lock:
+            event = _inflight.get(flight_key)
+            if event is not None:
+                return False, event, flight_key
+            event = _inflight[flight_key] = threading.Event()
+            return True, event, flight_key
+
+    def _land(self, flight_key, event):
+        with _state_lock:
+            _inflight.pop(flight_key, None)
+        event.set()
+
+    def _compute_once(self, key, compute, timeout, stale_ttl, version):
+        leader, event, flight_key = self._flight(key, version)
+        if not leader:
+            self.metrics.incr(key, 'coalesced')
+            event.wait(self.lock_timeout)
+            entry = self.get(key, version=version)
+            if entry is not None:
+                return entry[0]
+            return self._compute_once(key, compute, timeout, stale_ttl, version)  # o leader falhou
+
+        lock_key = f"{key}:lock"
+        locked = False
+        try:
+            locked = self._acquire(lock_key, version)
+            if not locked:
+                # Outro processo está a calcular: espera pelo valor dele
+                entry = self._wait_for_shared(key, version)
+                if entry is not None:
+                    return entry[0]
+            value = compute()
+            self.metrics.incr(key, 'computes')
+            self._store(key, value, timeout, stale_ttl, version)
+            return value
+        finally:
+            if locked:
+                self._release(lock_key, version)
+            self._land(flight_key, event)
+
+    # --- Lock entre processos ---
+
+    def _lock_path(self, lock_key, version):
+        name = hashlib.md5(self.make_and_validate_key(lock_key, version=version).encode()).hexdigest()
+        return os.path.join(self.shared._dir, f"{name}.lock")
+
+    def _acquire(self, lock_key, version):
+        if not isinstance(self.shared, FileBasedCache):
+            return self.shared.add(lock_key, 1, self.lock_timeout, version=version)
+        # add() do FileBasedCache lê e depois escreve: dois processos podiam
+        # ficar ambos com o lock. A criação do ficheiro com O_EXCL é atómica.
+        path = self._lock_path(lock_key, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) < self.lock_timeout:
+                        return False
+                    os.remove(path)  # lock de um cálculo que morreu
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def _release(self, lock_key, version):
+        if not isinstance(self.shared, FileBasedCache):
+            self.shared.delete(lock_key, version=version)
+            return
+        try:
+            os.remove(self._lock_path(lock_key, version))
+        except FileNotFoundError:
+            pass
+
+    def _wait_for_shared(self, key, version):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.shared.get(key, version=version)
+            if entry is not None:
+                self.metrics.incr(key, 'coalesced')
+                return entry
+        return None
+
+    def _refresh_in_background(self, key, compute, timeout, stale_ttl, version):
+        leader, event, flight_key = self._flight(key, version)
+        if not leader:
+            return  # já está a ser recalculado
+
+        def refresh():
+            lock_key = f"{key}:lock"
+            locked = False
+            try:
+                locked = self._acquire(lock_key, version)
+                if locked:
+                    value = compute()
+                    self.metrics.incr(key, 'computes')
+                    self._store(key, value, timeout, stale_ttl, version)
+            except Exception:
+                logger.exception("Falha a recalcular a chave de cache %s", key)
+            finally:
+                if locked:
+                    self._release(lock_key, version)
+                self._land(flight_key, event)
+                connections.close_all()  # o compute() pode ter lido de qualquer base de dados
+
+        _refresh_pool().submit(refresh)
+
+
+def cache_metrics():
+    """Métricas por namespace de todas as TieredCache deste processo."""
+    with _state_lock:
+        return {name: metrics.snapshot() for name, metrics in _metrics.items()}
@@ -0,0 +1,135 @@
+# lineaProject/db_routers.py
+# Encaminhamento entre a base de dados primária ('default') e as réplicas de
+# leitura (settings.DATABASE_REPLICAS, ver DATABASES em settings.py).
+# Escritas e migrações vão sempre para a primária. As leituras só vão para
+# uma réplica quando tudo isto se verifica:
+#   - o pedido é GET/HEAD a uma das views de DATABASE_REPLICA_VIEWS (feed,
+#     perfil, detalhe do post, notícias) ou o código está em replica_reads();
+#   - o modelo é de uma app de DATABASE_REPLICA_APPS (postsApp, newsApp);
+#   - não há uma transação aberta na primária (as réplicas não veem o que
+#     ainda não foi confirmado);
+#   - o utilizador não escreveu nada há menos de DATABASE_PIN_SECONDS
+#     (read-your-writes: um comentário novo não desaparece no redirect para o
+#     post só porque a réplica ainda não o recebeu). Depois de uma escrita, o
+#     ReadYourWritesMiddleware deixa um cookie que fixa o utilizador na
+#     primária até expirar.
+# Fora de um pedido (comandos, threads em background) tudo vai para a
+# primária. Sem réplicas configuradas tudo vai para 'default'.
+# As migrações só correm na primária: o esquema chega às réplicas pela
+# replicação (com duas bases SQLite, copiar o ficheiro da primária).
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReadState:
+    """Estado do pedido atual: réplica a usar (ou None) e se houve escritas."""
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.wrote = False
+
+
+_read_state = ContextVar('db_read_state', default=None)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Dentro do bloco as leituras elegíveis vão para uma réplica (a mesma em todo o bloco)."""
+    aliases = replicas()
+    state = ReadState(random.choice(aliases) if enabled and aliases else None)
+    token = _read_state.set(state)
+    try:
+        yield state
+    finally:
+        _read_state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _read_state.get()
+        if state is None or state.replica is None:
+            return PRIMARY
+        if model._meta.app_label not in getattr(settings, 'DATABASE_REPLICA_APPS', ()):
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        # Objetos relacionados com um objeto lido da primária ficam na primária
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == PRIMARY:
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _read_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primária e réplicas têm os mesmos dados
+        aliases = {PRIMARY, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReadYourWritesMiddleware:
+    """
+    Ativa as réplicas nas views de leitura (DATABASE_REPLICA_VIEWS) e, depois
+    de um pedido que escreve, fixa o utilizador na primária durante
+    DATABASE_PIN_SECONDS com o cookie DATABASE_PIN_COOKIE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with replica_reads(enabled=False) as state:
+            request.db_read_state = state
+            response = self.get_response(request)
+
+        # Pedidos não seguros contam como escrita mesmo sem passar pelo router
+        # (SQL direto, p.ex. postsApp/likes.py)
+        wrote = state.wrote or (request.method not in SAFE_METHODS and response.status_code < 400)
+        if wrote and replicas():
+            seconds = getattr(settings, 'DATABASE_PIN_SECONDS', 5)
+            response.set_cookie(
+                settings.DATABASE_PIN_COOKIE, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        aliases = replicas()
+        state = request.db_read_state
+        if (
+            aliases
+            and request.method in SAFE_METHODS
+            and request.resolver_match.view_name in getattr(settings, 'DATABASE_REPLICA_VIEWS', ())
+            and not self.pinned(request)
+        ):
+            state.replica = random.choice(aliases)
+        return None
+
+    def pinned(self, request):
+        try:
+            until = int(request.COOKIES.get(settings.DATABASE_PIN_COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
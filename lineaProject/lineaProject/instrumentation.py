@@ -0,0 +1,138 @@
+# lineaProject/instrumentation.py
+# Contagem das queries SQL por pedido: nº de queries, tempo total na base
+# de dados e queries repetidas com a mesma forma (sinal de N+1).
+# - QueryBudgetMiddleware: expõe os valores em headers X-DB-* (se
+#   QUERY_BUDGET_HEADERS) e numa linha de log ('lineaProject.queries'), e
+#   compara com QUERY_BUDGETS[nome do URL] (ex.: 'posts:feed': 8);
+# - QueryBudgetTestMixin: nos testes, um pedido acima do orçamento falha.
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import override_settings
+
+logger = logging.getLogger('lineaProject.queries')
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(sql):
+    """SQL sem valores: `IN (%s, %s, ...)` -> `IN (...)`, literais -> ?."""
+    return LITERAL_RE.sub('?', IN_LIST_RE.sub('IN (...)', sql))
+
+
+class QueryRecorder:
+    """Wrapper para connection.execute_wrapper que acumula as estatísticas."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """{forma: nº de execuções} das queries repetidas."""
+        return {shape: n for shape, n in self.shapes.items() if n > 1}
+
+    def record(self):
+        """Context manager que regista as queries de todas as ligações."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def query_budget(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+class QueryBudgetMiddleware:
+    """Deve ficar no início de MIDDLEWARE (conta também a sessão e o utilizador)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        budget = query_budget(view_name)
+        duplicates = recorder.duplicates
+        response.query_stats = recorder
+
+        if getattr(settings, 'QUERY_BUDGET_HEADERS', settings.DEBUG):
+            response['X-DB-Queries'] = recorder.count
+            response['X-DB-Time-Ms'] = f"{recorder.duration * 1000:.1f}"
+            response['X-DB-Duplicate-Queries'] = sum(duplicates.values()) - len(duplicates)
+            if budget is not None:
+                response['X-DB-Query-Budget'] = budget
+
+        over_budget = budget is not None and recorder.count > budget
+        log = logger.warning if over_budget or duplicates else logger.info
+        log(
+            "%s %s %s %s queries=%d db=%.1fms duplicates=%d%s",
+            request.method, request.path, view_name or '-', response.status_code,
+            recorder.count, recorder.duration * 1000, sum(duplicates.values()) - len(duplicates),
+            f" budget={budget} EXCEDIDO" if over_budget else "",
+        )
+        if duplicates:
+            for shape, n in sorted(duplicates.items(), key=lambda item: -item[1])[:3]:
+                logger.debug("  %dx %s", n, shape[:300])
+
+        if over_budget and getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(
+                f"{view_name}: {recorder.count} queries (orçamento {budget}). Repetidas: "
+                + "; ".join(f"{n}x {shape[:200]}" for shape, n in duplicates.items())
+            )
+        return response
+
+
+class QueryBudgetTestMixin:
+    """
+    Para TestCase: com QUERY_BUDGET_RAISE ativo, qualquer pedido do test client
+    acima do orçamento levanta QueryBudgetExceeded (o teste falha).
+    assertWithinQueryBudget(response) verifica um pedido explicitamente.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._query_budget_settings = override_settings(QUERY_BUDGET_RAISE=True)
+        cls._query_budget_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._query_budget_settings.disable()
+        super().tearDownClass()
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        stats = response.query_stats
+        view_name = response.resolver_match.view_name
+        budget = budget if budget is not None else query_budget(view_name)
+        self.assertIsNotNone(budget, f"Sem orçamento de queries para {view_name} (QUERY_BUDGETS).")
+        self.assertLessEqual(
+            stats.count, budget,
+            f"{view_name}: {stats.count} queries (orçamento {budget}). Repetidas: {stats.duplicates}",
+        )
@@ -0,0 +1,163 @@
+# lineaProject/media_views.py
+# Serve os ficheiros de MEDIA_ROOT (substitui o django.views.static.serve,
+# que só serve para desenvolvimento):
+#   - pedidos Range (um intervalo) -> 206, para o seek dos vídeos no feed;
+#   - ETag / Last-Modified -> 304 nos pedidos condicionais;
+#   - Cache-Control immutable para os nomes endereçados pelo sha256
+#     (postsApp/storage.py), que nunca mudam de conteúdo;
+#   - com MEDIA_ACCEL_REDIRECT_PREFIX, o envio fica para o proxy
+#     (X-Accel-Redirect); sem ele, o FileResponse deixa o servidor WSGI usar
+#     sendfile (wsgi.file_wrapper) quando disponível.
+# Só são servidos os originais dos vídeos (nomes endereçados) e as versões
+# geradas das imagens (posts/renditions/): os originais das imagens podem ter
+# EXIF e os temporários (posts/media/tmp/) são uploads a meio. O Content-Type
+# vem de uma lista fixa (nunca text/html) e vai com nosniff.
+
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from postsApp.storage import hashed_name_mime, is_hashed_name
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Versões geradas por postsApp/media_processing.py ({pk}_{campo}.{extensão})
+RENDITION_RE = re.compile(r'^posts/renditions/[\w-]+\.(?P<extension>webp|jpg)$')
+RENDITION_MIMES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+
+def parse_range(header, size):
+    """
+    Devolve (início, fim) inclusivos de um header Range, None se não houver
+    (ou se não for suportado: vários intervalos) ou 'invalid' se não for
+    satisfazível.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # bytes=-N: os últimos N bytes
+        length = min(int(last), size)
+        return (size - length, size - 1) if length else 'invalid'
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, end
+
+
+class RangeFile:
+    """Lê só `length` bytes de um ficheiro já posicionado no início do intervalo."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # sendfile (ex.: gunicorn) começa na posição atual e envia Content-Length bytes
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _content_type(name):
+    """Content-Type de um ficheiro servível, ou None se não puder ser servido."""
+    mime = hashed_name_mime(name)
+    if mime is not None:
+        return mime if mime.startswith('video/') else None
+    match = RENDITION_RE.match(name)
+    if match:
+        return RENDITION_MIMES[match['extension']]
+    return None
+
+
+def _if_range_matches(if_range, etag, mtime):
+    """If-Range pode ser um ETag (forte) ou uma data HTTP (igual à Last-Modified)."""
+    if if_range.startswith('"'):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and date == int(mtime)
+
+
+def _etag(name, stat):
+    if is_hashed_name(name):
+        return f'"{os.path.splitext(os.path.basename(name))[0]}"'
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:  # ../
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    content_type = _content_type(name)
+    if content_type is None:
+        raise Http404
+    stat = os.stat(full_path)
+    etag = _etag(name, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': IMMUTABLE if is_hashed_name(name) else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}',
+        'X-Content-Type-Options': 'nosniff',
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header in ('ETag', 'Cache-Control'):
+            not_modified.headers[header] = headers[header]
+        return not_modified
+
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        # O proxy trata do envio (e dos Range); só passam os headers de cache
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(name)
+        return response
+
+    size = stat.st_size
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if if_range and not _if_range_matches(if_range, etag, stat.st_mtime):
+        byte_range = None  # o ficheiro mudou: envia-o inteiro
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type, headers=headers)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(RangeFile(file, end - start + 1), status=206, content_type=content_type, headers=headers)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import copy
 import os
 from dotenv import load_dotenv
 
@@ -48,14 +49,18 @@ INSTALLED_APPS = [
     'authenticationApp.apps.AuthenticationappConfig',
     'postsApp.apps.PostsappConfig',
     'newsApp.apps.NewsappConfig',
+
+    'channels',
 ]
 
 MIDDLEWARE = [
+    'lineaProject.instrumentation.QueryBudgetMiddleware',  # primeiro: conta todas as queries do pedido
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'lineaProject.db_routers.ReadYourWritesMiddleware',  # réplicas de leitura (ver db_routers.py)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,9 +96,66 @@ DATABASES = {
         'PASSWORD': os.getenv("DB_PASSWORD", ""),
         'HOST': os.getenv("DB_HOST", ""),
         'PORT': os.getenv("DB_PORT", ""),
+        # Ligações persistentes: reutilizadas durante DB_CONN_MAX_AGE segundos
+        # (0 fecha no fim de cada pedido) e verificadas antes de cada pedido.
+        # Em ASGI (daphne, DJANGO_ASGI definido em asgi.py) o default é 0: cada
+        # pedido pode correr numa thread diferente e as ligações persistentes
+        # ficavam abertas, uma por thread (usar DB_POOL)
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 0 if os.getenv("DJANGO_ASGI") else 60)),
+        'CONN_HEALTH_CHECKS': os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() == "true",
+        'OPTIONS': {},
     }
 }
 
+# Testes em SQLite: base de dados num ficheiro (em memória há uma só ligação e
+# os testes com várias threads, p.ex. LikeConcurrencyTests, eram saltados)
+if 'sqlite' in DATABASES['default']['ENGINE']:
+    DATABASES['default']['TEST'] = {'NAME': os.getenv("DB_TEST_NAME", BASE_DIR / "test_db.sqlite3")}
+
+# Pool de ligações do backend PostgreSQL (psycopg 3 + psycopg_pool, ver
+# requirements.txt). Com pool as ligações persistentes ficam
+# desligadas: é o pool que as mantém abertas. Recomendado em ASGI (daphne),
+# onde cada pedido pode correr numa thread diferente.
+if os.getenv("DB_POOL", "False").lower() == "true" and 'postgresql' in DATABASES['default']['ENGINE']:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+        'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+        'timeout': int(os.getenv("DB_POOL_TIMEOUT", 10)),  # segundos à espera de uma ligação livre
+    }
+
+# Réplica de leitura (ver lineaProject/db_routers.py): definida por
+# DB_REPLICA_NAME e/ou DB_REPLICA_HOST; o resto herda de 'default'. Nos testes
+# é um espelho da base de dados 'default'.
+if os.getenv("DB_REPLICA_NAME") or os.getenv("DB_REPLICA_HOST"):
+    DATABASES['replica'] = {
+        **copy.deepcopy(DATABASES['default']),
+        **{
+            key: os.getenv(f"DB_REPLICA_{key}")
+            for key in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')
+            if os.getenv(f"DB_REPLICA_{key}")
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['lineaProject.db_routers.PrimaryReplicaRouter']
+# Acrescenta uma réplica SQLite real para postsApp.tests.ReplicaTests
+TEST_RUNNER = 'lineaProject.test_runner.TestRunner'
+
+# Leituras nas réplicas: só destas apps e nestas views (GET/HEAD); depois de
+# uma escrita o utilizador lê da primária durante DB_PIN_SECONDS (cookie)
+DATABASE_REPLICA_APPS = {'postsApp', 'newsApp'}
+DATABASE_REPLICA_VIEWS = {
+    'posts:feed',
+    'posts:user_posts',
+    'posts:detail',
+    'news:news_index',
+    'news:news_search',
+}
+DATABASE_PIN_SECONDS = int(os.getenv("DB_PIN_SECONDS", 5))  # >= atraso máximo das réplicas
+DATABASE_PIN_COOKIE = 'db_pin'
+
 AUTH_USER_MODEL = 'authenticationApp.UserProfile'
 
 # Password validation
@@ -143,3 +205,92 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")# para testes
 # tenho de configurar SMTP real para produção
 
+
+# Notícias: intervalo (segundos) entre execuções de `manage.py news_ingest --loop`
+NEWS_INGEST_INTERVAL = int(os.getenv("NEWS_INGEST_INTERVAL", 900))
+NEWS_FEED_TIMEOUT = int(os.getenv("NEWS_FEED_TIMEOUT", 10))  # segundos, prazo total por feed
+NEWS_FEED_MAX_BYTES = int(os.getenv("NEWS_FEED_MAX_BYTES", 5 * 1024 * 1024))  # tamanho máximo de um feed
+NEWS_FEED_WORKERS = int(os.getenv("NEWS_FEED_WORKERS", 6))  # downloads em paralelo
+NEWS_EMBEDDING_TTL_DAYS = int(os.getenv("NEWS_EMBEDDING_TTL_DAYS", 30))  # cache de embeddings
+# Scorer de relevância: 'model' (modelo neste processo), 'worker' (processo
+# `manage.py news_scoring_worker` partilhado) ou 'keywords' (fallback sem modelo)
+NEWS_SCORER = os.getenv("NEWS_SCORER", "model")
+NEWS_SCORING_ADDRESS = os.getenv("NEWS_SCORING_ADDRESS", "127.0.0.1:6010")
+NEWS_SCORING_AUTHKEY = os.getenv("NEWS_SCORING_AUTHKEY", "")  # obrigatório com NEWS_SCORER=worker
+# Formato dos embeddings na cache: 'float32', 'float16' ou 'int8'
+NEWS_EMBEDDING_DTYPE = os.getenv("NEWS_EMBEDDING_DTYPE", "float32")
+# Pesquisa semântica (índice vetorial em memória, ver newsApp/vector_index.py)
+NEWS_SEMANTIC_TOP_K = int(os.getenv("NEWS_SEMANTIC_TOP_K", 100))
+NEWS_VECTOR_IVF_THRESHOLD = int(os.getenv("NEWS_VECTOR_IVF_THRESHOLD", 20000))  # artigos
+NEWS_VECTOR_NPROBE = int(os.getenv("NEWS_VECTOR_NPROBE", 8))
+NEWS_VECTOR_REFRESH_INTERVAL = int(os.getenv("NEWS_VECTOR_REFRESH_INTERVAL", 60))  # segundos
+
+# Timeline (ver postsApp/timeline.py): contas com pelo menos este nº de
+# seguidores não fazem fan-out on write (os posts são juntos na leitura)
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.getenv("TIMELINE_FANOUT_MAX_FOLLOWERS", 10000))
+TIMELINE_BACKFILL_LIMIT = int(os.getenv("TIMELINE_BACKFILL_LIMIT", 200))  # posts por novo follow
+
+# Media dos posts (ver postsApp/media_processing.py)
+POST_MEDIA_WORKERS = int(os.getenv("POST_MEDIA_WORKERS", 2))  # threads por processo
+POST_MEDIA_RENDITION_FORMAT = os.getenv("POST_MEDIA_RENDITION_FORMAT", "WEBP")  # WEBP ou JPEG
+# False: o processo web não gera as versões (usar `manage.py process_media --loop`)
+POST_MEDIA_PROCESS_IN_BACKGROUND = os.getenv("POST_MEDIA_PROCESS_IN_BACKGROUND", "True").lower() == "true"
+POST_MEDIA_MAX_FILE_SIZE = int(os.getenv("POST_MEDIA_MAX_FILE_SIZE", 50 * 1024 * 1024))  # bytes por ficheiro
+POST_MEDIA_MAX_POST_SIZE = int(os.getenv("POST_MEDIA_MAX_POST_SIZE", 200 * 1024 * 1024))  # bytes por post
+
+# Servir media (ver lineaProject/media_views.py). Com um proxy à frente (nginx),
+# definir o prefixo de uma location `internal` que aponte para MEDIA_ROOT
+# (ex.: /protected-media/) e o ficheiro é enviado pelo proxy (X-Accel-Redirect).
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "")
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", 3600))  # segundos (nomes não endereçados)
+
+# Notificações em tempo real (Channels, ver postsApp/consumers.py)
+ASGI_APPLICATION = 'lineaProject.asgi.application'
+# InMemory só serve para um processo (desenvolvimento/testes); com vários
+# processos definir CHANNEL_LAYERS_REDIS_URL (requer channels_redis)
+if os.getenv("CHANNEL_LAYERS_REDIS_URL"):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.getenv("CHANNEL_LAYERS_REDIS_URL")]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+# Likes/comentários agrupados por (destinatário, post, tipo) durante esta
+# janela (segundos) antes de escrever a notificação; 0 escreve logo
+NOTIFICATION_COALESCE_WINDOW = float(os.getenv("NOTIFICATION_COALESCE_WINDOW", 5))
+
+# Orçamento de queries SQL por URL (ver lineaProject/instrumentation.py):
+# acima dele o pedido fica no log como warning e os testes falham
+QUERY_BUDGETS = {
+    'posts:feed': 8,
+    'posts:user_posts': 7,
+    'posts:detail': 8,
+    'news:news_index': 4,
+}
+QUERY_BUDGET_HEADERS = os.getenv("QUERY_BUDGET_HEADERS", str(DEBUG)).lower() == "true"  # headers X-DB-*
+QUERY_BUDGET_RAISE = os.getenv("QUERY_BUDGET_RAISE", "False").lower() == "true"
+
+# Cache em dois níveis (ver lineaProject/cache.py): LRU no processo +
+# cache partilhada. A partilhada é em memória por omissão (desenvolvimento
+# e testes); em produção CACHE_BACKEND/CACHE_LOCATION apontam p.ex. para
+# django.core.cache.backends.filebased.FileBasedCache + uma pasta, ou Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'lineaProject.cache.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", 1000)),
+            'LOCAL_TIMEOUT': int(os.getenv("CACHE_LOCAL_TIMEOUT", 5)),  # segundos
+        },
+    },
+    'shared': {
+        'BACKEND': os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", "linea"),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv("CACHE_MAX_ENTRIES", 10000))},
+    },
+}
+NEWS_INDEX_CACHE_TIMEOUT = int(os.getenv("NEWS_INDEX_CACHE_TIMEOUT", 60))  # segundos (lista de notícias)
+NEWS_INDEX_CACHE_STALE = int(os.getenv("NEWS_INDEX_CACHE_STALE", 300))  # servida antiga enquanto recalcula
@@ -0,0 +1,31 @@
+# lineaProject/test_runner.py
+# Test runner do projeto (settings.TEST_RUNNER): com a base de dados de
+# teste SQLite num ficheiro, acrescenta a base TEST_REPLICA_ALIAS, uma
+# segunda base SQLite real usada por postsApp.tests.ReplicaTests como
+# réplica (a réplica configurada por DB_REPLICA_NAME é um espelho da
+# primária nos testes e não mostra o atraso da replicação).
+# TEST_REPLICA_ALIAS não entra em DATABASE_REPLICAS: só os testes que a
+# pedem (override_settings) leem dela.
+
+import copy
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+TEST_REPLICA_ALIAS = 'test_replica'
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        default = connections.settings['default']  # já com os valores por omissão
+        test_name = str(default['TEST']['NAME'] or '')
+        if 'sqlite' not in default['ENGINE'] or not test_name or test_name == ':memory:':
+            return
+        root, extension = os.path.splitext(test_name)
+        replica = copy.deepcopy(default)
+        replica['TEST']['NAME'] = f"{root}_replica{extension}"
+        settings.DATABASES[TEST_REPLICA_ALIAS] = connections.settings[TEST_REPLICA_ALIAS] = replica
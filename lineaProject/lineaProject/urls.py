@@ -15,10 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, include, re_path
 from django.conf import settings
 
+from .media_views import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -26,4 +27,7 @@ urlpatterns = [
     path('authenticationApp/', include('authenticationApp.urls')),
     path('postsApp/', include('postsApp.urls')),
     path('newsApp/', include('newsApp.urls')),
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+    # Media com Range, ETag e cache (ver lineaProject/media_views.py)
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$", serve_media, name='media'),
+]
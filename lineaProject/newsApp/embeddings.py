@@ -0,0 +1,113 @@
+# newsApp/embeddings.py
+# Cache persistente de embeddings (tabela ArticleEmbedding): só os textos
+# novos ou alterados são passados ao modelo.
+#
+# Os vetores são guardados normalizados (norma 1), em float32, float16 ou
+# int8 (componentes * 127), conforme settings.NEWS_EMBEDDING_DTYPE.
+
+import hashlib
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ArticleEmbedding, NewsArticle
+
+DTYPE = np.dtype('<f4')  # float32 little-endian (formato devolvido)
+STORAGE_DTYPES = {
+    'float32': np.dtype('<f4'),
+    'float16': np.dtype('<f2'),
+    'int8': np.dtype('i1'),
+}
+INT8_SCALE = 127.0
+BATCH_SIZE = 500  # limite de parâmetros por query (SQLite)
+
+
+def text_key(text, model_name):
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+
+def normalize(vectors):
+    """Normaliza as linhas (norma L2 = 1); linhas a zero ficam a zero."""
+    vectors = np.asarray(vectors, dtype=DTYPE)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def pack_vector(vector, dtype='float32'):
+    """Vetor normalizado -> bytes no formato de armazenamento."""
+    if dtype == 'int8':
+        vector = np.clip(np.rint(vector * INT8_SCALE), -127, 127)
+    return np.asarray(vector).astype(STORAGE_DTYPES[dtype]).tobytes()
+
+
+def unpack_vector(blob, dim, dtype='float32'):
+    """bytes -> vetor float32."""
+    vector = np.frombuffer(bytes(blob), dtype=STORAGE_DTYPES[dtype], count=dim).astype(DTYPE)
+    if dtype == 'int8':
+        vector /= INT8_SCALE
+    return vector
+
+
+def get_embeddings(texts, model_name, encode, dtype=None):
+    """
+    Devolve uma matriz float32 (len(texts) x dim) com os embeddings
+    normalizados dos textos. `encode(lista_de_textos)` só é chamado para os
+    textos sem entrada na cache.
+    """
+    dtype = dtype or getattr(settings, 'NEWS_EMBEDDING_DTYPE', 'float32')
+    keys = [text_key(t, model_name) for t in texts]
+    unique_keys = list(dict.fromkeys(keys))
+
+    # --- Ler da cache ---
+    vectors = {}
+    for i in range(0, len(unique_keys), BATCH_SIZE):
+        rows = ArticleEmbedding.objects.filter(key__in=unique_keys[i:i + BATCH_SIZE]) \
+            .values_list('key', 'dim', 'dtype', 'vector')
+        for key, dim, row_dtype, blob in rows:
+            vectors[key] = unpack_vector(blob, dim, row_dtype)
+
+    now = timezone.now()
+    hits = list(vectors)
+    for i in range(0, len(hits), BATCH_SIZE):
+        ArticleEmbedding.objects.filter(key__in=hits[i:i + BATCH_SIZE]).update(last_used_at=now)
+
+    # --- Calcular só os que faltam ---
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+
+    if missing:
+        encoded = normalize(encode(list(missing.values())))
+        new_rows = []
+        for key, vector in zip(missing, encoded):
+            packed = pack_vector(vector, dtype)
+            # guarda-se o que foi efetivamente armazenado (com a perda da quantização)
+            vectors[key] = unpack_vector(packed, vector.shape[0], dtype)
+            new_rows.append(ArticleEmbedding(
+                key=key,
+                model_name=model_name,
+                dim=vector.shape[0],
+                dtype=dtype,
+                vector=packed,
+                last_used_at=now,
+            ))
+        ArticleEmbedding.objects.bulk_create(new_rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    if not keys:
+        return np.empty((0, 0), dtype=DTYPE)
+    return np.stack([vectors[k] for k in keys])
+
+
+def evict_embeddings(max_age_days):
+    """
+    Apaga os embeddings não usados há mais de `max_age_days` dias, exceto os
+    dos artigos gravados (necessários para a pesquisa semântica).
+    """
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted, _ = ArticleEmbedding.objects.filter(last_used_at__lt=cutoff) \
+        .exclude(key__in=NewsArticle.objects.values('embedding_key')).delete()
+    return deleted
@@ -0,0 +1,140 @@
+# newsApp/fetch.py
+# Camada de download dos feeds: pedidos em paralelo (thread pool limitado),
+# prazo total por feed, tamanho máximo da resposta e GET condicional
+# (ETag / Last-Modified).
+
+import time
+import zlib
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import feedparser
+
+USER_AGENT = 'lineaProject/1.0 (+feedparser)'
+MAX_BYTES = 5 * 1024 * 1024  # por feed, comprimido e descomprimido
+CHUNK_SIZE = 64 * 1024
+
+
+class FeedTooLarge(Exception):
+    pass
+
+
+def _set_socket_timeout(response, seconds):
+    # O timeout do urlopen vale por operação no socket; para cumprir o prazo
+    # total cada leitura só pode esperar pelo tempo que falta
+    sock = getattr(getattr(response.fp, 'raw', None), '_sock', None)
+    if sock is not None:
+        sock.settimeout(seconds)
+
+
+def _read_body(response, deadline, max_bytes):
+    chunks = []
+    size = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("prazo do feed excedido")
+        _set_socket_timeout(response, remaining)
+        chunk = response.read1(CHUNK_SIZE)  # o que já chegou (read() esperaria pelo pedaço todo)
+        if not chunk:
+            return b''.join(chunks)
+        size += len(chunk)
+        if size > max_bytes:
+            raise FeedTooLarge(f"resposta maior que {max_bytes} bytes")
+        chunks.append(chunk)
+
+
+def _gunzip(body, max_bytes):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    data = decompressor.decompress(body, max_bytes + 1)
+    if len(data) > max_bytes:
+        raise FeedTooLarge(f"resposta descomprimida maior que {max_bytes} bytes")
+    return data
+
+
+class FeedResult:
+    """Resultado do download de um feed (com métricas)."""
+
+    def __init__(self, source, url, status=None, etag=None, modified=None,
+                 parsed=None, latency=0.0, bytes_received=0, error=None):
+        self.source = source
+        self.url = url
+        self.status = status
+        self.etag = etag
+        self.modified = modified
+        self.parsed = parsed
+        self.latency = latency  # segundos
+        self.bytes_received = bytes_received  # bytes transferidos (comprimidos)
+        self.error = error
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+    @property
+    def entries(self):
+        return self.parsed.entries if self.parsed is not None else []
+
+    def __repr__(self):
+        return f"<FeedResult {self.source} status={self.status} {self.latency * 1000:.0f}ms {self.bytes_received}B>"
+
+
+def fetch_feed(source, url, etag=None, modified=None, timeout=10, max_bytes=MAX_BYTES):
+    """
+    Faz o download de um feed. Se o servidor responder 304 o feed não é
+    lido nem parseado (parsed fica None). `timeout` é o prazo total (ligação
+    + leitura) e `max_bytes` o tamanho máximo da resposta. Nunca levanta
+    exceções: os erros ficam em `result.error`.
+    """
+    headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'}
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+
+    result = FeedResult(source, url, etag=etag, modified=modified)
+    started = time.monotonic()
+    deadline = started + timeout
+    try:
+        request = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = _read_body(response, deadline, max_bytes)
+            result.status = response.status
+            result.bytes_received = len(body)
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = _gunzip(body, max_bytes)
+            result.etag = response.headers.get('ETag')
+            result.modified = response.headers.get('Last-Modified')
+            result.parsed = feedparser.parse(body)
+    except urllib.error.HTTPError as e:
+        result.status = e.code
+        if e.code != 304:
+            result.error = str(e)
+    except Exception as e:  # timeout, DNS, ligação recusada, resposta grande demais...
+        result.error = str(e)
+    result.latency = time.monotonic() - started
+    return result
+
+
+def fetch_feeds(feeds, states=None, timeout=10, max_workers=6, max_bytes=MAX_BYTES):
+    """
+    Faz o download de vários feeds em paralelo.
+
+    feeds: dict {source: url}
+    states: dict {source: (etag, modified)} guardados da última execução
+    Devolve a lista de FeedResult pela mesma ordem de `feeds`.
+    """
+    states = states or {}
+    if not feeds:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(feeds))) as pool:
+        futures = [
+            pool.submit(
+                fetch_feed, source, url, *states.get(source, (None, None)),
+                timeout=timeout, max_bytes=max_bytes,
+            )
+            for source, url in feeds.items()
+        ]
+        return [f.result() for f in futures]
@@ -0,0 +1,163 @@
+# newsApp/ingest.py
+# Ingestão dos feeds RSS para a tabela NewsArticle (corre fora do ciclo do pedido).
+
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone as dj_timezone
+
+from .embeddings import evict_embeddings, text_key
+from .fetch import fetch_feeds
+from .models import FeedState, NewsArticle
+from .text import search_text
+from .relevance import MODEL_NAME, news_relevance
+
+NEWS_GENERATION_KEY = 'news:generation'
+
+# --- RSS FEEDS ---
+RSS_FEEDS_INTERNATIONAL = {
+    'the_archpaper': 'https://archpaper.com/feed/',
+    'the_art_newspaper': 'https://www.theartnewspaper.com/rss.xml',
+    'globalvoices': 'https://globalvoices.org/feeds/',
+}
+
+RSS_FEEDS_NATIONAL = {
+    'rtp_noticias_cultura': 'https://www.rtp.pt/noticias/rss/feeds/Cultura',
+    'observador': 'https://observador.pt/seccao/cultura/arte/feed',
+    'cnn': 'https://cnnportugal.iol.pt/rss/arte',
+}
+
+# Campos atualizados quando um artigo (mesmo link) volta a aparecer no feed
+UPDATE_FIELDS = [
+    'source', 'title', 'summary', 'search_text', 'published', 'published_at',
+    'score', 'is_national', 'embedding_key', 'updated_at',
+]
+
+
+def _to_datetime(published_parsed):
+    # O feedparser devolve struct_time em UTC
+    if not published_parsed:
+        return None
+    return datetime(*published_parsed[:6], tzinfo=timezone.utc)
+
+
+def _entry_to_article(source, entry, is_national):
+    title = getattr(entry, 'title', 'No title')
+    summary = getattr(entry, 'summary', '')
+    return NewsArticle(
+        source=source,
+        title=title,
+        link=entry.link,
+        summary=summary,
+        search_text=search_text(title, summary),
+        published=getattr(entry, 'published', ''),
+        published_at=_to_datetime(getattr(entry, 'published_parsed', None)),
+        is_national=is_national
+    )
+
+
+# --- Download dos feeds ---
+def news_fetch_feeds():
+    """
+    Faz o download de todos os feeds em paralelo, usando o ETag/Last-Modified
+    guardado em FeedState. Devolve a lista de FeedResult (o estado novo só é
+    gravado com save_feed_states, depois de os artigos estarem gravados).
+    """
+    feeds = {**RSS_FEEDS_INTERNATIONAL, **RSS_FEEDS_NATIONAL}
+    states = FeedState.objects.filter(source__in=feeds).values_list('source', 'etag', 'last_modified')
+
+    return fetch_feeds(
+        feeds,
+        states={source: (etag, last_modified) for source, etag, last_modified in states},
+        timeout=getattr(settings, 'NEWS_FEED_TIMEOUT', 10),
+        max_workers=getattr(settings, 'NEWS_FEED_WORKERS', 6),
+        max_bytes=getattr(settings, 'NEWS_FEED_MAX_BYTES', 5 * 1024 * 1024),
+    )
+
+
+def save_feed_states(results):
+    """
+    Grava o ETag/Last-Modified e as métricas de cada feed. Se a ingestão
+    falhar antes disto, a próxima volta a pedir os feeds completos.
+    """
+    states = {s.source: s for s in FeedState.objects.filter(source__in=[r.source for r in results])}
+    now = dj_timezone.now()
+    for result in results:
+        state = states.get(result.source) or FeedState(source=result.source)
+        state.url = result.url
+        if result.error is None:
+            # Em caso de erro mantém-se o ETag anterior
+            state.etag = result.etag or ''
+            state.last_modified = result.modified or ''
+        state.last_status = result.status
+        state.last_latency_ms = int(result.latency * 1000)
+        state.last_bytes = result.bytes_received
+        state.last_error = result.error or ''
+        state.last_fetched_at = now
+        state.save()
+
+
+# --- Função para buscar artigos ---
+def news_get_articles(results):
+    """
+    Converte os feeds descarregados (FeedResult) numa lista de NewsArticle
+    (não gravados), sem duplicados (pelo link). Feeds sem alterações (304)
+    ou com erro não têm entradas. Entradas sem link são ignoradas: o link é
+    a chave de deduplicação e o destino do artigo.
+    """
+    articles = []
+    for result in results:
+        is_national = result.source in RSS_FEEDS_NATIONAL
+        for entry in result.entries:
+            if not getattr(entry, 'link', ''):
+                continue
+            articles.append(_entry_to_article(result.source, entry, is_national))
+
+    # --- Remover duplicados ---
+    unique = {a.link: a for a in articles}
+    return list(unique.values())
+
+
+# --- Ingestão ---
+def bump_news_generation():
+    # As listas em cache (newsApp/views.py) incluem a geração na chave. Só
+    # chega aos processos web com uma cache partilhada entre processos
+    # (CACHE_BACKEND: ficheiros, Redis, ...); com a LocMemCache as listas só
+    # mudam quando expiram (NEWS_INDEX_CACHE_TIMEOUT + NEWS_INDEX_CACHE_STALE).
+    cache.set(NEWS_GENERATION_KEY, time.time_ns(), None)
+
+
+def news_ingest():
+    """
+    Busca os feeds, calcula a relevância e grava os artigos na base de dados.
+    Artigos já existentes (mesmo link) são atualizados.
+    Devolve (nº de artigos, lista de FeedResult). Se o scorer falhar (p.ex.
+    ScorerUnavailable) nada é gravado, nem o estado dos feeds.
+    """
+    results = news_fetch_feeds()
+    articles = news_get_articles(results)
+    if not articles:
+        save_feed_states(results)
+        return 0, results
+
+    # --- Calcular relevância ---
+    texts = [f"{a.title} {a.summary}" for a in articles]
+    scores = news_relevance(texts)
+    for article, text, score in zip(articles, texts, scores):
+        article.score = score
+        article.embedding_key = text_key(text, MODEL_NAME)
+
+    NewsArticle.objects.bulk_create(
+        articles,
+        update_conflicts=True,
+        unique_fields=['link'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+    # --- Limpar embeddings antigos da cache ---
+    save_feed_states(results)
+    evict_embeddings(getattr(settings, 'NEWS_EMBEDDING_TTL_DAYS', 30))
+    bump_news_generation()
+    return len(articles), results
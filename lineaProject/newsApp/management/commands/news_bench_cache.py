@@ -0,0 +1,61 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from lineaProject.cache import cache_metrics
+from newsApp.views import _index_page
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark da cache da lista de notícias: N pedidos simultâneos com a "
+        "cache vazia (single-flight) e depois com o valor expirado (stale-while-revalidate)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=50)
+        parser.add_argument('--tab', default='all')
+
+    def handle(self, *args, **options):
+        computes = []
+
+        def compute():
+            computes.append(1)
+            return _index_page(options['tab'], 1)
+
+        key = f"news:bench:{time.time_ns()}"
+        self.stdout.write(f"{options['threads']} pedidos simultâneos, cache vazia")
+        elapsed = self.burst(options['threads'], lambda: cache.get_or_compute(key, compute, timeout=1, stale_ttl=60))
+        self.stdout.write(f"  {elapsed * 1000:.1f} ms, {len(computes)} cálculo(s)")
+
+        time.sleep(1.1)  # expira (continua dentro do stale_ttl)
+        computes.clear()
+        self.stdout.write(f"{options['threads']} pedidos simultâneos, valor expirado")
+        elapsed = self.burst(options['threads'], lambda: cache.get_or_compute(key, compute, timeout=1, stale_ttl=60))
+        time.sleep(0.2)  # recálculo em background
+        self.stdout.write(f"  {elapsed * 1000:.1f} ms, {len(computes)} cálculo(s) em background")
+
+        for name, namespaces in cache_metrics().items():
+            for ns, counts in namespaces.items():
+                self.stdout.write(f"{name} / {ns}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+    def burst(self, n, fn):
+        barrier = threading.Barrier(n)
+
+        def run():
+            try:
+                barrier.wait()
+                fn()
+            finally:
+                connections.close_all()  # a thread termina aqui
+
+        threads = [threading.Thread(target=run) for _ in range(n)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from newsApp.embeddings import STORAGE_DTYPES, normalize, pack_vector
+from newsApp.relevance import centroid_scores, keyword_centroid
+
+
+def legacy_scores(embs, keywords_emb):
+    # Implementação anterior: util.cos_sim(embs, keywords_emb).mean(dim=1)
+    return (normalize(embs) @ normalize(keywords_emb).T).mean(axis=1)
+
+
+def ranks(values):
+    order = np.argsort(-values, kind='stable')
+    result = np.empty(len(values), dtype=np.int64)
+    result[order] = np.arange(len(values))
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark do scoring de relevância: compara a matriz cos_sim completa "
+        "com o produto pelo centróide (float32/float16/int8)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=20000)
+        parser.add_argument('--dim', type=int, default=384)
+        parser.add_argument('--keywords', type=int, default=30)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--top', type=int, default=100, help="Top-k usado na comparação do ranking.")
+        parser.add_argument(
+            '--model', action='store_true',
+            help="Usa o modelo real (palavras-chave e artigos gravados) em vez de vetores aleatórios."
+        )
+
+    def handle(self, *args, **options):
+        embs, keywords_emb = self.load_vectors(options)
+        n = len(embs)
+        if n == 0:
+            raise CommandError("Sem artigos para o benchmark.")
+
+        reference, elapsed = self.timed(lambda: legacy_scores(embs, keywords_emb), options['repeat'])
+        self.report('cos_sim matrix (atual)', n, elapsed)
+
+        centroid = keyword_centroid(keywords_emb)
+        top = min(options['top'], n)
+        reference_top = set(np.argsort(-reference)[:top])
+        reference_ranks = ranks(reference)
+
+        for dtype in STORAGE_DTYPES:
+            stored = np.stack([
+                np.frombuffer(pack_vector(v, dtype), dtype=STORAGE_DTYPES[dtype])
+                for v in normalize(embs)
+            ])
+            # (int8: a escala 1/127 desaparece na normalização feita por lote)
+            scores, elapsed = self.timed(lambda: centroid_scores(stored, centroid), options['repeat'])
+            self.report(f'centroid {dtype}', n, elapsed)
+
+            max_diff = float(np.abs(scores - reference).max())
+            overlap = len(reference_top & set(np.argsort(-scores)[:top])) / top
+            spearman = float(np.corrcoef(ranks(scores), reference_ranks)[0, 1]) if n > 1 else 1.0
+            self.stdout.write(
+                f"    max |Δscore| = {max_diff:.2e}  top-{top} overlap = {overlap:.1%}  "
+                f"spearman = {spearman:.5f}"
+            )
+            if dtype == 'float32' and not (max_diff < 1e-5 and overlap == 1.0):
+                raise CommandError("O scoring por centróide (float32) não coincide com a implementação atual.")
+
+    def load_vectors(self, options):
+        if not options['model']:
+            rng = np.random.default_rng(0)
+            embs = rng.standard_normal((options['articles'], options['dim']), dtype=np.float32)
+            keywords_emb = rng.standard_normal((options['keywords'], options['dim']), dtype=np.float32)
+            return embs, keywords_emb
+
+        from newsApp.models import NewsArticle
+        from newsApp.relevance import EmbeddingScorer, keywords
+
+        scorer = EmbeddingScorer()
+        model = scorer._load()
+        texts = [
+            f"{title} {summary}"
+            for title, summary in NewsArticle.objects.values_list('title', 'summary')[:options['articles']]
+        ]
+        embs = model.encode(texts, convert_to_numpy=True) if texts else np.empty((0, 0), dtype=np.float32)
+        return embs, model.encode(keywords, convert_to_numpy=True)
+
+    def timed(self, func, repeat):
+        result = func()  # aquecimento
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return result, (time.perf_counter() - started) / repeat
+
+    def report(self, label, n, elapsed):
+        self.stdout.write(f"{label:<24} {elapsed * 1000:8.2f}ms  {n / elapsed:12,.0f} artigos/s")
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from lineaProject.cache import shared_across_processes
+from newsApp.ingest import news_ingest
+
+
+class Command(BaseCommand):
+    help = "Busca os feeds RSS e grava os artigos (com score) na base de dados."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Corre continuamente (worker), em vez de uma única vez."
+        )
+        parser.add_argument(
+            '--interval', type=int,
+            default=getattr(settings, 'NEWS_INGEST_INTERVAL', 900),
+            help="Segundos entre execuções no modo --loop (default: 900)."
+        )
+
+    def handle(self, *args, **options):
+        if not shared_across_processes(cache):
+            self.stderr.write(self.style.WARNING(
+                "A cache partilhada é local a este processo (CACHE_BACKEND): os processos web "
+                "só veem as notícias novas quando a lista em cache expirar."
+            ))
+        while True:
+            started = time.monotonic()
+            try:
+                count, results = news_ingest()
+                for r in results:
+                    status = 'not modified' if r.not_modified else (r.error or r.status)
+                    self.stdout.write(
+                        f"  {r.source:<22} {status}  {r.latency * 1000:6.0f}ms  {r.bytes_received:>8}B"
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{count} artigos ingeridos em {time.monotonic() - started:.1f}s"
+                ))
+            except Exception as e:
+                if not options['loop']:
+                    raise
+                # No modo worker uma falha não deve parar o loop
+                self.stderr.write(f"Erro na ingestão: {e}")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
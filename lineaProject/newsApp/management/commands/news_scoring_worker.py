@@ -0,0 +1,51 @@
+import threading
+from multiprocessing.connection import Listener
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from newsApp.relevance import EmbeddingScorer, recv_message, scoring_address, scoring_authkey, send_message
+
+
+class Command(BaseCommand):
+    help = (
+        "Processo dedicado de scoring: carrega o modelo uma única vez e serve "
+        "os pedidos dos workers web (usar com NEWS_SCORER=worker)."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            authkey = scoring_authkey()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        scorer = EmbeddingScorer()
+        scorer._load()  # carrega já o modelo, para o primeiro pedido não esperar
+        address = scoring_address()
+
+        with Listener(address, authkey=authkey) as listener:
+            self.stdout.write(self.style.SUCCESS(f"Worker de scoring à escuta em {address[0]}:{address[1]}"))
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:  # ex.: authkey errada
+                    self.stderr.write(f"Ligação recusada: {e}")
+                    continue
+                threading.Thread(target=self.serve, args=(scorer, conn), daemon=True).start()
+
+    def serve(self, scorer, conn):
+        with conn:
+            try:
+                request = recv_message(conn)
+                method, texts = request['method'], request['texts']
+                if method == 'score':
+                    send_message(conn, {'status': 'ok', 'scores': scorer.score(texts)})
+                elif method in ('encode', 'encode_queries'):
+                    embs = getattr(scorer, method)(texts)
+                    send_message(conn, {'status': 'ok', 'shape': list(embs.shape)}, embs)
+                else:
+                    raise ValueError(f"Método desconhecido: {method!r}")
+            except Exception as e:
+                send_message(conn, {'status': 'error', 'error': str(e)})
+            finally:
+                close_old_connections()
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100)),
+                ('title', models.TextField()),
+                ('link', models.URLField(max_length=1000, unique=True)),
+                ('summary', models.TextField(blank=True)),
+                ('published', models.CharField(blank=True, max_length=100)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('score', models.FloatField(default=0.0)),
+                ('is_national', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-score', '-published_at', '-id'],
+                'indexes': [models.Index(fields=['-score', '-published_at', '-id'], name='news_rank_idx'), models.Index(fields=['is_national', '-score', '-published_at', '-id'], name='news_tab_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100, unique=True)),
+                ('url', models.URLField(max_length=1000)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('last_status', models.PositiveIntegerField(blank=True, null=True)),
+                ('last_latency_ms', models.PositiveIntegerField(default=0)),
+                ('last_bytes', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
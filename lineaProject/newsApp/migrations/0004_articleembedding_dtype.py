@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0003_articleembedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articleembedding',
+            name='dtype',
+            field=models.CharField(choices=[('float32', 'float32'), ('float16', 'float16'), ('int8', 'int8')], default='float32', max_length=10),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+TABLE = 'newsApp_newsarticle'
+
+# SQLite: tabela FTS5 (external content) mantida por triggers
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE newsapp_newsarticle_fts USING fts5(
+        title, search_text,
+        content='{TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER newsapp_newsarticle_fts_ai AFTER INSERT ON "{TABLE}" BEGIN
+        INSERT INTO newsapp_newsarticle_fts(rowid, title, search_text)
+        VALUES (new.id, new.title, new.search_text);
+    END""",
+    f"""CREATE TRIGGER newsapp_newsarticle_fts_ad AFTER DELETE ON "{TABLE}" BEGIN
+        INSERT INTO newsapp_newsarticle_fts(newsapp_newsarticle_fts, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+    END""",
+    f"""CREATE TRIGGER newsapp_newsarticle_fts_au AFTER UPDATE ON "{TABLE}" BEGIN
+        INSERT INTO newsapp_newsarticle_fts(newsapp_newsarticle_fts, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+        INSERT INTO newsapp_newsarticle_fts(rowid, title, search_text)
+        VALUES (new.id, new.title, new.search_text);
+    END""",
+    "INSERT INTO newsapp_newsarticle_fts(newsapp_newsarticle_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS newsapp_newsarticle_fts_ai",
+    "DROP TRIGGER IF EXISTS newsapp_newsarticle_fts_ad",
+    "DROP TRIGGER IF EXISTS newsapp_newsarticle_fts_au",
+    "DROP TABLE IF EXISTS newsapp_newsarticle_fts",
+]
+
+# Postgres: índice GIN sobre o tsvector do texto já sem acentos
+POSTGRES_CREATE = [
+    f"""CREATE INDEX newsapp_newsarticle_search_gin ON "{TABLE}"
+        USING GIN (to_tsvector('simple', search_text))""",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS newsapp_newsarticle_search_gin",
+]
+
+
+def fill_search_text(apps, schema_editor):
+    from newsApp.text import search_text
+
+    NewsArticle = apps.get_model('newsApp', 'NewsArticle')
+    db_alias = schema_editor.connection.alias
+    articles = list(NewsArticle.objects.using(db_alias).only('title', 'summary'))
+    for article in articles:
+        article.search_text = search_text(article.title, article.summary)
+    NewsArticle.objects.using(db_alias).bulk_update(articles, ['search_text'], batch_size=500)
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0004_articleembedding_dtype'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='search_text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}),
+            _run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+    ]
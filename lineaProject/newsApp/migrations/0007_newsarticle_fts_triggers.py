@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:20
+
+from django.db import migrations
+
+
+TABLE = 'newsApp_newsarticle'
+
+# SQLite: o AlterField da 0006 reconstrói a tabela (cria uma nova, copia e
+# renomeia), o que apaga os triggers da 0005 — a tabela FTS5 deixava de
+# receber os artigos novos. Recria os triggers e reconstrói o índice.
+SQLITE_CREATE = [
+    "DROP TRIGGER IF EXISTS newsapp_newsarticle_fts_ai",
+    "DROP TRIGGER IF EXISTS newsapp_newsarticle_fts_ad",
+    "DROP TRIGGER IF EXISTS newsapp_newsarticle_fts_au",
+    f"""CREATE TRIGGER newsapp_newsarticle_fts_ai AFTER INSERT ON "{TABLE}" BEGIN
+        INSERT INTO newsapp_newsarticle_fts(rowid, title, search_text)
+        VALUES (new.id, new.title, new.search_text);
+    END""",
+    f"""CREATE TRIGGER newsapp_newsarticle_fts_ad AFTER DELETE ON "{TABLE}" BEGIN
+        INSERT INTO newsapp_newsarticle_fts(newsapp_newsarticle_fts, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+    END""",
+    f"""CREATE TRIGGER newsapp_newsarticle_fts_au AFTER UPDATE ON "{TABLE}" BEGIN
+        INSERT INTO newsapp_newsarticle_fts(newsapp_newsarticle_fts, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+        INSERT INTO newsapp_newsarticle_fts(rowid, title, search_text)
+        VALUES (new.id, new.title, new.search_text);
+    END""",
+    "INSERT INTO newsapp_newsarticle_fts(newsapp_newsarticle_fts) VALUES ('rebuild')",
+]
+
+
+def recreate_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_CREATE:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsApp', '0006_newsarticle_embedding_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
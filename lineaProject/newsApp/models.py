@@ -1,3 +1,61 @@
 from django.db import models
 
 # Create your models here.
+
+class NewsArticle(models.Model):
+    source = models.CharField(max_length=100)
+    title = models.TextField()
+    link = models.URLField(max_length=1000, unique=True)  # chave de deduplicação
+    summary = models.TextField(blank=True)
+    search_text = models.TextField(blank=True)  # título + resumo sem HTML nem acentos (ver newsApp/search.py)
+    published = models.CharField(max_length=100, blank=True)  # texto original do feed
+    published_at = models.DateTimeField(null=True, blank=True)
+    score = models.FloatField(default=0.0)
+    is_national = models.BooleanField(default=False)
+    embedding_key = models.CharField(max_length=64, blank=True)  # ArticleEmbedding.key do título + resumo
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ['-score', '-published_at', '-id']
+        indexes = [
+            models.Index(fields=['-score', '-published_at', '-id'], name='news_rank_idx'),
+            models.Index(fields=['is_national', '-score', '-published_at', '-id'], name='news_tab_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source}: {self.title[:50]}"
+
+
+class FeedState(models.Model):
+    # Estado do último download de cada feed (para GET condicional e métricas)
+    source = models.CharField(max_length=100, unique=True)
+    url = models.URLField(max_length=1000)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    last_status = models.PositiveIntegerField(null=True, blank=True)
+    last_latency_ms = models.PositiveIntegerField(default=0)
+    last_bytes = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.last_status})"
+
+
+class ArticleEmbedding(models.Model):
+    # Cache persistente de embeddings: chave = sha256(modelo + texto)
+    class Dtype(models.TextChoices):
+        FLOAT32 = 'float32', 'float32'
+        FLOAT16 = 'float16', 'float16'
+        INT8 = 'int8', 'int8'
+
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    dim = models.PositiveIntegerField()
+    dtype = models.CharField(max_length=10, choices=Dtype.choices, default=Dtype.FLOAT32)
+    vector = models.BinaryField()  # vetor normalizado, little-endian (dim * itemsize bytes)
+    last_used_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name}:{self.key[:12]}"
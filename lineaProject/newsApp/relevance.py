@@ -0,0 +1,228 @@
+# newsApp/relevance.py
+# Serviço de scoring de relevância das notícias.
+#
+# O modelo SentenceTransformer só é carregado no primeiro uso (nunca no
+# import), por isso `migrate`, os testes e os workers web não pagam o custo.
+# O scorer usado é escolhido em settings.NEWS_SCORER:
+#   'model'    -> modelo carregado neste processo
+#   'worker'   -> pedidos enviados ao processo `manage.py news_scoring_worker`
+#   'keywords' -> fallback barato por palavras-chave (sem modelo)
+# Os scores por palavras-chave não estão na mesma escala que os do modelo
+# (cosseno), por isso nunca se misturam: sem o worker o scoring falha
+# (ScorerUnavailable) em vez de mudar de scorer.
+
+import json
+import logging
+import math
+import threading
+from collections import Counter
+from multiprocessing.connection import Client
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .embeddings import get_embeddings, normalize
+from .text import fold, tokenize
+
+logger = logging.getLogger(__name__)
+
+# --- Palavras-chave em inglês e português ---
+keywords = [
+    "art", "painting", "sculpture", "museum", "gallery", "exhibition",
+    "installation", "drawing", "photography", "architecture", "design", "pritzker",
+    "arte", "pintura", "escultura", "museu", "galeria", "exposição",
+    "instalação", "desenho", "fotografia", "arquitetura", "design", "prémio pritzker",
+    "poesia", "poetry", "literatura", "literature", "arquitetura", "arquiteto"
+]
+
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+SCORE_BATCH_SIZE = 1024
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024  # pedidos/respostas do worker de scoring
+
+
+class ScorerUnavailable(Exception):
+    """O worker de scoring não respondeu."""
+
+
+# --- Score = cos_sim médio às palavras-chave ---
+# mean_i cos(e, k_i) = (e / |e|) . mean_i(k_i / |k_i|), por isso basta um
+# produto interno com o centróide das palavras-chave normalizadas. O centróide
+# não é renormalizado, para os scores serem iguais aos de cos_sim(...).mean().
+def keyword_centroid(keywords_emb):
+    return normalize(keywords_emb).mean(axis=0)
+
+def centroid_scores(embs, centroid, batch_size=SCORE_BATCH_SIZE):
+    """Scores de uma matriz de embeddings (qualquer dtype), em lotes fixos."""
+    import numpy as np
+
+    scores = np.empty(len(embs), dtype=np.float32)
+    for start in range(0, len(embs), batch_size):
+        batch = normalize(embs[start:start + batch_size])
+        scores[start:start + batch_size] = batch @ centroid
+    return scores
+
+
+# --- Scorer com o modelo multilingue ---
+class EmbeddingScorer:
+    supports_embeddings = True
+
+    def __init__(self, model_name=MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._centroid = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                logger.info("A carregar o modelo %s", self.model_name)
+                model = SentenceTransformer(self.model_name)
+                self._centroid = keyword_centroid(model.encode(keywords, convert_to_numpy=True))
+                self._model = model
+        return self._model
+
+    def encode(self, texts):
+        """
+        Embeddings (matriz float32) de uma lista de textos, usando a cache
+        persistente: só os textos novos ou alterados passam pelo modelo.
+        """
+        model = self._load()
+        return get_embeddings(texts, self.model_name, lambda missing: model.encode(missing, convert_to_numpy=True))
+
+    def encode_queries(self, texts):
+        """Embeddings normalizados de textos de pesquisa (sem a cache persistente)."""
+        return normalize(self._load().encode(list(texts), convert_to_numpy=True))
+
+    def score(self, texts):
+        embs = self.encode(texts)
+        return centroid_scores(embs, self._centroid).tolist()
+
+
+# --- Scorer por palavras-chave (fallback sem modelo) ---
+class KeywordScorer:
+    supports_embeddings = False
+
+    def __init__(self):
+        folded = {fold(k) for k in keywords}
+        self._terms = {k for k in folded if ' ' not in k}
+        self._phrases = {k for k in folded if ' ' in k}
+        self._total = len(folded)
+
+    def score(self, texts):
+        scores = []
+        for text in texts:
+            counts = Counter(tokenize(text))
+            folded = fold(text)
+            tfs = [counts[t] for t in self._terms if counts[t]]
+            tfs += [folded.count(p) for p in self._phrases if p in folded]
+            # tf sublinear, normalizado pelo nº de palavras-chave
+            scores.append(sum(1 + math.log(tf) for tf in tfs) / self._total)
+        return scores
+
+
+# --- Protocolo do worker de scoring ---
+# Mensagens JSON (nunca pickle: quem fala com o worker não pode executar
+# código no outro lado). Os embeddings seguem numa segunda mensagem, em bytes
+# float32, com a forma indicada no JSON.
+def send_message(conn, message, array=None):
+    conn.send_bytes(json.dumps(message).encode('utf-8'))
+    if array is not None:
+        conn.send_bytes(array.astype('<f4').tobytes())
+
+
+def recv_message(conn):
+    return json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES))
+
+
+def recv_array(conn, shape):
+    import numpy as np
+
+    return np.frombuffer(conn.recv_bytes(MAX_MESSAGE_BYTES), dtype='<f4').reshape(shape)
+
+
+# --- Scorer remoto (processo dedicado partilhado pelos workers web) ---
+class RemoteScorer:
+    supports_embeddings = True
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+
+    def _call(self, method, texts):
+        try:
+            with Client(self.address, authkey=self.authkey) as conn:
+                send_message(conn, {'method': method, 'texts': list(texts)})
+                response = recv_message(conn)
+                if response['status'] != 'ok':
+                    raise RuntimeError(response['error'])
+                if method in ('encode', 'encode_queries'):
+                    return recv_array(conn, response['shape'])
+                return response['scores']
+        except (OSError, EOFError) as e:
+            raise ScorerUnavailable(f"Worker de scoring indisponível em {self.address}: {e}") from e
+
+    def encode(self, texts):
+        return self._call('encode', texts)
+
+    def encode_queries(self, texts):
+        return self._call('encode_queries', texts)
+
+    def score(self, texts):
+        return self._call('score', texts)
+
+
+def scoring_address():
+    host, _, port = settings.NEWS_SCORING_ADDRESS.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def scoring_authkey():
+    """Chave partilhada com o worker (NEWS_SCORING_AUTHKEY); obrigatória."""
+    authkey = getattr(settings, 'NEWS_SCORING_AUTHKEY', '')
+    if not authkey:
+        raise ImproperlyConfigured("NEWS_SCORING_AUTHKEY tem de estar definido para usar o worker de scoring.")
+    return authkey.encode('utf-8')
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+def get_scorer():
+    """Devolve o scorer configurado (criado uma vez por processo)."""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            kind = getattr(settings, 'NEWS_SCORER', 'model')
+            if kind == 'keywords':
+                _scorer = KeywordScorer()
+            elif kind == 'worker':
+                _scorer = RemoteScorer(scoring_address(), scoring_authkey())
+            elif kind == 'model':
+                _scorer = EmbeddingScorer()
+            else:
+                raise ValueError(f"NEWS_SCORER inválido: {kind!r}")
+    return _scorer
+
+
+def news_supports_embeddings():
+    return get_scorer().supports_embeddings
+
+
+def news_encode_query(text):
+    """Embedding de uma pesquisa: não fica na cache dos artigos (nem escreve na base de dados)."""
+    return get_scorer().encode_queries([text])[0]
+
+def news_relevance(texts):
+    """
+    Recebe um texto (string) ou lista de textos.
+    Retorna um score ou lista de scores de relevância.
+    """
+    single_input = False
+    if isinstance(texts, str):
+        texts = [texts]
+        single_input = True
+
+    scores = get_scorer().score(texts)
+    return scores[0] if single_input else scores
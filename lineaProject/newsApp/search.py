@@ -0,0 +1,100 @@
+# newsApp/search.py
+# Pesquisa full-text nos artigos gravados (título + resumo, sem acentos).
+#   SQLite   -> tabela FTS5 newsapp_newsarticle_fts (ranking bm25)
+#   Postgres -> índice GIN sobre to_tsvector('simple', search_text) (ts_rank)
+# Outras bases de dados usam um filtro LIKE (sem índice).
+# As tabelas/índices são criados na migração 0005_newsarticle_search.
+# O SQL direto corre na base de dados de leitura escolhida pelo router (a
+# réplica, nas views de DATABASE_REPLICA_VIEWS).
+
+from django.db import connections, router
+
+from .models import NewsArticle
+from .text import tokenize
+
+MAX_TERMS = 10
+
+SQLITE_MATCH = "newsapp_newsarticle_fts MATCH %s"
+SQLITE_COUNT = f"SELECT count(*) FROM newsapp_newsarticle_fts WHERE {SQLITE_MATCH}"
+SQLITE_PAGE = (
+    "SELECT rowid FROM newsapp_newsarticle_fts "
+    f"WHERE {SQLITE_MATCH} "
+    "ORDER BY bm25(newsapp_newsarticle_fts, 5.0, 1.0), rowid DESC "
+    "LIMIT %s OFFSET %s"
+)
+
+POSTGRES_MATCH = "to_tsvector('simple', search_text) @@ to_tsquery('simple', %s)"
+POSTGRES_COUNT = f'SELECT count(*) FROM "newsApp_newsarticle" WHERE {POSTGRES_MATCH}'
+POSTGRES_PAGE = (
+    'SELECT id FROM "newsApp_newsarticle" '
+    f"WHERE {POSTGRES_MATCH} "
+    "ORDER BY ts_rank(to_tsvector('simple', search_text), to_tsquery('simple', %s)) DESC, id DESC "
+    "LIMIT %s OFFSET %s"
+)
+
+
+class SearchResults:
+    """
+    Resultados de uma pesquisa por SQL direto, compatíveis com o Paginator:
+    count() faz um COUNT e cada fatia [a:b] faz uma query com LIMIT/OFFSET.
+    """
+
+    def __init__(self, count_sql, page_sql, match, using):
+        self.count_sql = count_sql
+        self.page_sql = page_sql
+        self.match = match
+        self.using = using
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(self.count_sql, [self.match])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("SearchResults só suporta fatias simples.")
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        if stop <= start:
+            return []
+
+        # O Postgres usa o termo duas vezes (filtro e ranking)
+        params = [self.match] * self.page_sql.count('%s')
+        params[-2:] = [stop - start, start]
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(self.page_sql, params)
+            ids = [row[0] for row in cursor.fetchall()]
+
+        articles = NewsArticle.objects.using(self.using).in_bulk(ids)
+        return [articles[i] for i in ids if i in articles]
+
+
+def search_articles(query):
+    """
+    Pesquisa por todas as palavras de `query` (prefixo, sem acentos), ordenada
+    por relevância. Sem palavras devolve todos os artigos (ordem por score).
+    """
+    terms = tokenize(query)[:MAX_TERMS]
+    if not terms:
+        return NewsArticle.objects.all()
+
+    using = router.db_for_read(NewsArticle)
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        match = ' AND '.join(f'"{t}"*' for t in terms)
+        return SearchResults(SQLITE_COUNT, SQLITE_PAGE, match, using)
+
+    if vendor == 'postgresql':
+        match = ' & '.join(f'{t}:*' for t in terms)
+        return SearchResults(POSTGRES_COUNT, POSTGRES_PAGE, match, using)
+
+    articles = NewsArticle.objects.all()
+    for term in terms:
+        articles = articles.filter(search_text__contains=term)
+    return articles
@@ -1,3 +1,466 @@
-from django.test import TestCase
+import gzip
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import Listener
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from lineaProject.cache import LocalLRU, MISSING
+from lineaProject.db_routers import replica_reads
+from lineaProject.test_runner import TEST_REPLICA_ALIAS
+
+from .embeddings import get_embeddings, normalize, pack_vector
+from .fetch import fetch_feed
+from .management.commands.news_scoring_worker import Command as ScoringWorker
+from . import ingest, relevance
+from .models import ArticleEmbedding, FeedState, NewsArticle
+from .relevance import RemoteScorer, ScorerUnavailable, scoring_authkey
+from .search import search_articles
+from .text import search_text
+from .vector_index import ArticleVectorIndex, VectorIndex, nlist_for, top_k
 
 # Create your tests here.
+
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Teste</title>
+<item><title>Artigo</title><link>http://example.com/artigo</link></item>
+</channel></rss>"""
+INGEST_FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Teste</title>
+<item><title>Arte</title><link>http://example.com/arte</link></item>
+<item><title>Arte (repetido)</title><link>http://example.com/arte</link></item>
+<item><title>Sem link</title></item>
+<item><title>Museu</title><link>http://example.com/museu</link></item>
+</channel></rss>"""
+ETAG = '"v1"'
+LAST_MODIFIED = 'Sat, 17 Oct 2026 10:00:00 GMT'
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/feed':
+            if self.headers.get('If-None-Match') == ETAG or self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = gzip.compress(FEED)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('ETag', ETAG)
+            self.send_header('Last-Modified', LAST_MODIFIED)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/ingest':
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('Content-Length', str(len(INGEST_FEED)))
+            self.end_headers()
+            self.wfile.write(INGEST_FEED)
+        elif self.path == '/slow':
+            # Cada pedaço chega antes do timeout de uma leitura, mas o total não
+            self.send_response(200)
+            self.end_headers()
+            try:
+                for _ in range(20):
+                    self.wfile.write(b' ' * 10)
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # o cliente desistiu (prazo excedido)
+        elif self.path == '/big':
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b' ' * 100_000)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FeedServerMixin:
+    """Servidor HTTP local com os feeds de teste (FeedHandler)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+class FetchFeedTests(FeedServerMixin, SimpleTestCase):
+    """Download dos feeds contra um servidor HTTP local."""
+
+    def test_ok(self):
+        result = fetch_feed('teste', f'{self.base_url}/feed')
+        self.assertIsNone(result.error)
+        self.assertEqual(result.status, 200)
+        self.assertEqual((result.etag, result.modified), (ETAG, LAST_MODIFIED))
+        self.assertEqual([e.link for e in result.entries], ['http://example.com/artigo'])
+
+    def test_not_modified(self):
+        for etag, modified in ((ETAG, None), (None, LAST_MODIFIED)):
+            result = fetch_feed('teste', f'{self.base_url}/feed', etag=etag, modified=modified)
+            self.assertTrue(result.not_modified)
+            self.assertIsNone(result.error)
+            self.assertEqual(result.entries, [])
+
+    def test_total_deadline(self):
+        result = fetch_feed('teste', f'{self.base_url}/slow', timeout=0.5)
+        self.assertIsNotNone(result.error)
+        self.assertLess(result.latency, 1.5)
+
+    def test_max_bytes(self):
+        result = fetch_feed('teste', f'{self.base_url}/big', max_bytes=10_000)
+        self.assertIn('maior', result.error)
+        self.assertIsNone(result.parsed)
+
+
+@override_settings(NEWS_SCORER='keywords')
+class IngestTests(FeedServerMixin, TestCase):
+    """Ingestão: sem duplicados (pelo link) e sem entradas sem link."""
+
+    def setUp(self):
+        relevance._scorer = None
+        self.addCleanup(setattr, relevance, '_scorer', None)
+        for feeds in (ingest.RSS_FEEDS_INTERNATIONAL, ingest.RSS_FEEDS_NATIONAL):
+            patcher = mock.patch.dict(feeds, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        ingest.RSS_FEEDS_NATIONAL['teste'] = f'{self.base_url}/ingest'
+
+    def test_ingest_twice(self):
+        for _ in range(2):
+            count, results = ingest.news_ingest()
+            self.assertEqual(count, 2)
+            self.assertEqual([r.error for r in results], [None])
+        articles = NewsArticle.objects.order_by('link').values_list('link', 'title', 'is_national')
+        self.assertEqual(list(articles), [
+            ('http://example.com/arte', 'Arte (repetido)', True),
+            ('http://example.com/museu', 'Museu', True),
+        ])
+        self.assertEqual(FeedState.objects.get().last_status, 200)
+
+
+class FakeScorer:
+    def score(self, texts):
+        return [float(len(t)) for t in texts]
+
+    def encode(self, texts):
+        return np.arange(len(texts) * 3, dtype=np.float32).reshape(len(texts), 3)
+
+    encode_queries = encode
+
+
+class RemoteScorerTests(SimpleTestCase):
+    """Protocolo do worker de scoring (JSON + bytes, sem pickle)."""
+
+    def test_round_trip(self):
+        with Listener(('127.0.0.1', 0), authkey=b'chave') as listener:
+            def serve():
+                for _ in range(3):
+                    ScoringWorker().serve(FakeScorer(), listener.accept())
+
+            thread = threading.Thread(target=serve, daemon=True)
+            thread.start()
+            scorer = RemoteScorer(listener.address, b'chave')
+            self.assertEqual(scorer.score(['ab', 'abc']), [2.0, 3.0])
+            np.testing.assert_array_equal(scorer.encode(['a', 'b']), FakeScorer().encode(['a', 'b']))
+            np.testing.assert_array_equal(scorer.encode_queries(['a']), FakeScorer().encode(['a']))
+            thread.join(5)
+
+    def test_worker_down(self):
+        with Listener(('127.0.0.1', 0)) as listener:
+            address = listener.address  # porta livre depois de fechar
+        with self.assertRaises(ScorerUnavailable):
+            RemoteScorer(address, b'chave').score(['texto'])
+
+    @override_settings(NEWS_SCORING_AUTHKEY='')
+    def test_authkey_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            scoring_authkey()
+
+
+class SemanticSearchFallbackTests(TestCase):
+
+    def tearDown(self):
+        relevance._scorer = None  # o scorer é criado uma vez por processo
+
+    def search(self, **settings):
+        relevance._scorer = None
+        with override_settings(**settings):
+            return self.client.get('/newsApp/search/', {'q': 'arte', 'mode': 'semantic'})
+
+    def test_worker_down(self):
+        response = self.search(NEWS_SCORER='worker', NEWS_SCORING_AUTHKEY='chave', NEWS_SCORING_ADDRESS='127.0.0.1:1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['mode'], 'text')
+
+    def test_scorer_without_embeddings(self):
+        response = self.search(NEWS_SCORER='keywords')
+        self.assertEqual(response.context['mode'], 'text')
+        self.assertFalse(ArticleEmbedding.objects.exists())
+
+
+class TextSearchTests(TestCase):
+    """Índice full-text mantido pelos triggers (migrações 0005 e 0007)."""
+
+    def create(self, title):
+        return NewsArticle.objects.create(
+            source='teste', title=title, link=f'http://example.com/{title}', search_text=search_text(title, ''),
+        )
+
+    def titles(self, query):
+        return [a.title for a in search_articles(query)[0:10]]
+
+    def test_index_follows_writes(self):
+        article = self.create('Arte nova')
+        self.create('Música')
+        self.assertEqual(self.titles('arte'), ['Arte nova'])
+        article.title, article.search_text = 'Teatro', search_text('Teatro', '')
+        article.save()
+        self.assertEqual(self.titles('arte'), [])
+        self.assertEqual(self.titles('teatro'), ['Teatro'])
+        article.delete()
+        self.assertEqual(self.titles('teatro'), [])
+
+
+class CountingScorer:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.append(list(texts))
+        return np.random.default_rng(len(texts)).normal(size=(len(texts), 3)).astype(np.float32)
+
+
+class EmbeddingCacheTests(TestCase):
+    """Só os textos novos ou alterados chegam ao modelo (newsApp/embeddings.py)."""
+
+    def test_only_missing_texts_are_encoded(self):
+        scorer = CountingScorer()
+        first = get_embeddings(['a', 'b', 'a'], 'teste', scorer.encode)
+        self.assertEqual(scorer.encoded, [['a', 'b']])
+        self.assertEqual(ArticleEmbedding.objects.count(), 2)
+
+        scorer.encoded.clear()
+        again = get_embeddings(['b', 'a'], 'teste', scorer.encode)  # nova execução
+        self.assertEqual(scorer.encoded, [])
+        np.testing.assert_array_equal(again, first[[1, 0]])
+
+        get_embeddings(['a', 'c'], 'teste', scorer.encode)  # só 'c' é novo
+        get_embeddings(['a'], 'outro-modelo', scorer.encode)  # a chave inclui o modelo
+        self.assertEqual(scorer.encoded, [['c'], ['a']])
+        self.assertEqual(ArticleEmbedding.objects.count(), 4)
+
+
+def clustered_vectors(n_clusters, per_cluster, dim=16, seed=1):
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(n_clusters, dim)))
+    vectors = normalize(np.repeat(centers, per_cluster, axis=0) + 0.15 * rng.normal(size=(n_clusters * per_cluster, dim)))
+    queries = normalize(centers + 0.1 * rng.normal(size=centers.shape))
+    return vectors, queries
+
+
+class VectorIndexTests(SimpleTestCase):
+    """Pesquisa exata e IVF do índice vetorial (newsApp/vector_index.py)."""
+
+    def brute_force(self, vectors, query, k):
+        return list(np.argsort(-(vectors @ query), kind='stable')[:k])
+
+    def test_top_k(self):
+        scores = np.random.default_rng(0).normal(size=50)
+        np.testing.assert_array_equal(top_k(scores, 5), np.argsort(-scores)[:5])
+        self.assertEqual(len(top_k(scores, 100)), 50)
+        self.assertEqual(len(top_k(np.empty(0), 5)), 0)
+
+    def test_exact_search(self):
+        vectors, queries = clustered_vectors(5, 40)
+        index = VectorIndex()
+        index.upsert(list(range(len(vectors))), vectors)
+        for query in queries:
+            hits = index.search(query, 10)
+            self.assertEqual([i for i, _ in hits], self.brute_force(vectors, query, 10))
+            self.assertEqual([score for _, score in hits], sorted((score for _, score in hits), reverse=True))
+
+    def test_ivf_recall(self):
+        vectors, queries = clustered_vectors(10, 100)
+        index = VectorIndex(ivf_threshold=100, nprobe=4)
+        index.upsert(list(range(len(vectors))), vectors)
+        self.assertTrue(index.needs_training)
+        index.train()
+        self.assertFalse(index.needs_training)
+        self.assertEqual(len(index.centroids), nlist_for(len(vectors)))
+        recall = np.mean([
+            len({i for i, _ in index.search(query, 10)} & set(self.brute_force(vectors, query, 10))) / 10
+            for query in queries
+        ])
+        self.assertGreaterEqual(recall, 0.9)
+
+    def test_upsert_replaces(self):
+        vectors, queries = clustered_vectors(10, 20)
+        index = VectorIndex(ivf_threshold=100, nprobe=2)
+        index.upsert(list(range(len(vectors))), vectors)
+        index.train()
+        index.upsert([3], queries[9:])  # o artigo 3 muda de grupo
+        self.assertEqual(len(index), len(vectors))
+        np.testing.assert_array_equal(index.vectors[3], queries[9])
+        article_id, score = index.search(queries[9], 1)[0]
+        self.assertEqual(article_id, 3)
+        self.assertAlmostEqual(score, 1.0, places=5)
+        self.assertEqual(index.assign[3], np.argmax(index.centroids @ queries[9]))
+
+
+class ArticleVectorIndexTests(TestCase):
+    """Refresh incremental do índice a partir de ArticleEmbedding."""
+
+    def embed(self, article, vector):
+        key = f'{article.pk}-{time.time_ns()}'
+        ArticleEmbedding.objects.create(
+            key=key, model_name='teste', dim=len(vector), vector=pack_vector(normalize(vector)),
+            last_used_at=article.updated_at,
+        )
+        article.embedding_key = key
+        article.save()
+
+    def test_incremental_refresh(self):
+        vectors, queries = clustered_vectors(3, 1)
+        first, second = [
+            NewsArticle.objects.create(source='teste', title=title, link=f'http://example.com/{title}')
+            for title in ('a', 'b')
+        ]
+        self.embed(first, vectors[0])
+        index = ArticleVectorIndex()
+        index.refresh(force=True)
+        self.assertEqual(len(index.index), 1)
+
+        # Gravado com o mesmo updated_at do último lido (fronteira): também é lido
+        self.embed(second, vectors[1])
+        NewsArticle.objects.filter(pk=second.pk).update(updated_at=first.updated_at)
+        index.refresh(force=True)
+        self.assertEqual(len(index.index), 2)
+
+        self.embed(first, vectors[2])  # alterado: substitui o vetor antigo
+        index.refresh(force=True)
+        self.assertEqual(len(index.index), 2)
+        self.assertEqual(index.search(queries[2], 1)[0][0], first.pk)
+        self.assertEqual(index.search(queries[1], 1)[0][0], second.pk)
+
+
+def tiered_caches(shared_backend, location=None):
+    """CACHES com duas TieredCache ("processos" com LRU e locks próprios) sobre a mesma cache partilhada."""
+    suffix = time.time_ns()  # estado novo em cada teste (LRU, LocMemCache)
+    tiered = {'BACKEND': 'lineaProject.cache.TieredCache', 'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 60}}
+    return {
+        'default': {**tiered, 'LOCATION': f'a-{suffix}'},
+        'other': {**tiered, 'LOCATION': f'b-{suffix}'},
+        'shared': {'BACKEND': shared_backend, 'LOCATION': location or f'shared-{suffix}'},
+    }
+
+
+class TieredCacheTests(SimpleTestCase):
+    """LRU local, single-flight e stale-while-revalidate (lineaProject/cache.py)."""
+
+    def test_lru_eviction(self):
+        lru = LocalLRU(2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')  # 'b' passa a ser o menos usado
+        lru.set('c', 3, 60)
+        self.assertIs(lru.get('b'), MISSING)
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+
+    def burst(self, aliases, compute, n=8):
+        barrier = threading.Barrier(n)
+        results = []
+
+        def run(i):
+            barrier.wait()
+            results.append(caches[aliases[i % len(aliases)]].get_or_compute('news:teste', compute, timeout=60))
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def assertSingleFlight(self, aliases):
+        computes = []
+
+        def compute():
+            computes.append(1)
+            time.sleep(0.2)
+            return 'valor'
+
+        self.assertEqual(self.burst(aliases, compute), ['valor'] * 8)
+        self.assertEqual(len(computes), 1)
+
+    def test_single_flight(self):
+        with override_settings(CACHES=tiered_caches('django.core.cache.backends.locmem.LocMemCache')):
+            self.assertSingleFlight(['default'])
+
+    def test_single_flight_between_processes(self):
+        # Lock por ficheiro (O_EXCL): o add() do FileBasedCache não é atómico
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES=tiered_caches('django.core.cache.backends.filebased.FileBasedCache', location),
+        ):
+            self.assertSingleFlight(['default', 'other'])
+
+    def test_stale_while_revalidate(self):
+        values = iter(['antigo', 'novo'])
+        with override_settings(CACHES=tiered_caches('django.core.cache.backends.locmem.LocMemCache')):
+            cache = caches['default']
+            get = lambda: cache.get_or_compute('news:teste', lambda: next(values), timeout=0.1, stale_ttl=60)  # noqa: E731
+            self.assertEqual(get(), 'antigo')
+            time.sleep(0.15)
+            self.assertEqual(get(), 'antigo')  # expirado: servido enquanto recalcula
+            deadline = time.monotonic() + 5
+            while get() != 'novo' and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(get(), 'novo')
+
+
+@skipUnless(TEST_REPLICA_ALIAS in settings.DATABASES, "Só com a base de dados de teste SQLite num ficheiro.")
+@override_settings(DATABASE_REPLICAS=[TEST_REPLICA_ALIAS])
+class SearchReplicaTests(TransactionTestCase):
+    """A pesquisa full-text (SQL direto) lê da base de dados escolhida pelo router."""
+    databases = {'default', TEST_REPLICA_ALIAS}
+
+    def test_search_uses_replica(self):
+        article = NewsArticle.objects.create(
+            source='teste', title='Arte nova', link='http://example.com/1', search_text=search_text('Arte nova', ''),
+        )
+        primary, replica = connections['default'], connections[TEST_REPLICA_ALIAS]
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+        article.delete()  # só a réplica ainda o tem
+        self.assertEqual(search_articles('arte').count(), 0)
+
+        with replica_reads(), CaptureQueriesContext(replica) as queries:
+            results = search_articles('arte')
+            self.assertEqual([a.title for a in results[0:10]], ['Arte nova'])
+            self.assertEqual(results.count(), 1)
+        self.assertEqual(len(queries), 3)  # página, artigos, total
@@ -0,0 +1,24 @@
+# newsApp/text.py
+# Normalização de texto partilhada (scoring por palavras-chave e pesquisa).
+
+import re
+import unicodedata
+
+from django.utils.html import strip_tags
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def fold(text):
+    """Minúsculas e sem acentos: 'Exposição' -> 'exposicao'."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+def search_text(title, summary):
+    """Texto indexado para pesquisa: título + resumo, sem HTML e sem acentos."""
+    return fold(f"{title} {strip_tags(summary or '')}")
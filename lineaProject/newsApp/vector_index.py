@@ -0,0 +1,217 @@
+# newsApp/vector_index.py
+# Índice vetorial em memória para a pesquisa semântica das notícias.
+#
+# Cada processo mantém uma matriz (n x dim) com os embeddings normalizados
+# dos artigos. Abaixo de NEWS_VECTOR_IVF_THRESHOLD artigos a pesquisa é exata
+# (produto pela matriz + argpartition); acima disso os vetores são agrupados
+# por k-means (IVF) e só os NEWS_VECTOR_NPROBE grupos mais próximos da query
+# são percorridos. O índice é atualizado de forma incremental: em cada
+# refresh só são lidos os artigos com updated_at >= ao último lido (os da
+# fronteira são relidos, o que é inofensivo). O treino do IVF (k-means) corre
+# numa thread em background; até terminar a pesquisa usa os centróides
+# anteriores (ou a pesquisa exata).
+
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .embeddings import BATCH_SIZE, DTYPE, normalize, unpack_vector
+from .models import ArticleEmbedding, NewsArticle
+
+logger = logging.getLogger(__name__)
+
+KMEANS_ITERATIONS = 10
+
+
+def top_k(scores, k):
+    """Posições dos k maiores scores, por ordem decrescente."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind='stable')]
+
+
+def kmeans(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    """k-means esférico simples (vetores normalizados, semelhança por cosseno)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = normalize(centroids)
+    return centroids
+
+
+def nlist_for(n):
+    return max(1, int(np.sqrt(n)))
+
+
+class VectorIndex:
+    def __init__(self, ivf_threshold=20000, nprobe=8):
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, 0), dtype=DTYPE)
+        self._positions = {}
+        # IVF (só quando o índice passa o limiar)
+        self.centroids = None
+        self.assign = None
+        self._trained_size = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def upsert(self, ids, vectors):
+        """Adiciona ou substitui vetores (já normalizados)."""
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=DTYPE)
+        if len(self) == 0:
+            self.vectors = np.empty((0, vectors.shape[1]), dtype=DTYPE)
+
+        new_ids, new_vectors = [], []
+        for article_id, vector in zip(ids, vectors):
+            pos = self._positions.get(article_id)
+            if pos is None:
+                new_ids.append(article_id)
+                new_vectors.append(vector)
+            else:
+                self.vectors[pos] = vector
+                if self.centroids is not None:
+                    self.assign[pos] = np.argmax(self.centroids @ vector)
+
+        if new_ids:
+            start = len(self.ids)
+            self.ids = np.concatenate([self.ids, np.asarray(new_ids, dtype=np.int64)])
+            self.vectors = np.concatenate([self.vectors, np.stack(new_vectors)])
+            for offset, article_id in enumerate(new_ids):
+                self._positions[article_id] = start + offset
+            if self.centroids is not None:
+                added = np.argmax(self.vectors[start:] @ self.centroids.T, axis=1)
+                self.assign = np.concatenate([self.assign, added])
+
+    @property
+    def needs_training(self):
+        """(Re)treino do IVF quando passa o limiar ou quando o índice duplica."""
+        n = len(self)
+        return n >= self.ivf_threshold and n >= 2 * self._trained_size
+
+    def set_centroids(self, centroids, trained_size):
+        """Usa centróides calculados (ex.: numa cópia dos vetores) e reatribui todos os vetores."""
+        self.assign = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self._trained_size = trained_size
+
+    def train(self):
+        self.set_centroids(kmeans(self.vectors, nlist_for(len(self))), len(self))
+
+    def search(self, query, k=10):
+        """Devolve [(article_id, score)] dos k vetores mais próximos da query."""
+        if len(self) == 0:
+            return []
+        query = normalize(query)
+
+        if self.centroids is None:
+            candidates = np.arange(len(self))
+        else:
+            probes = top_k(self.centroids @ query, self.nprobe)
+            candidates = np.flatnonzero(np.isin(self.assign, probes))
+
+        scores = self.vectors[candidates] @ query
+        best = top_k(scores, k)
+        return [(int(self.ids[candidates[i]]), float(scores[i])) for i in best]
+
+
+# --- Índice partilhado pelo processo, sincronizado com a base de dados ---
+class ArticleVectorIndex:
+    def __init__(self):
+        self.index = VectorIndex(
+            ivf_threshold=getattr(settings, 'NEWS_VECTOR_IVF_THRESHOLD', 20000),
+            nprobe=getattr(settings, 'NEWS_VECTOR_NPROBE', 8),
+        )
+        self._synced_until = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._training = False
+
+    def refresh(self, force=False):
+        """Carrega só os artigos novos/alterados desde o último refresh."""
+        interval = getattr(settings, 'NEWS_VECTOR_REFRESH_INTERVAL', 60)
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < interval:
+                return
+            self._checked_at = time.monotonic()
+
+            articles = NewsArticle.objects.exclude(embedding_key='')
+            if self._synced_until is not None:
+                articles = articles.filter(updated_at__gte=self._synced_until)
+            rows = list(articles.order_by('updated_at').values_list('id', 'embedding_key', 'updated_at'))
+            if not rows:
+                return
+
+            for i in range(0, len(rows), BATCH_SIZE):
+                batch = rows[i:i + BATCH_SIZE]
+                embeddings = {
+                    key: unpack_vector(blob, dim, dtype)
+                    for key, dim, dtype, blob in ArticleEmbedding.objects
+                    .filter(key__in=[key for _, key, _ in batch])
+                    .values_list('key', 'dim', 'dtype', 'vector')
+                }
+                found = [(article_id, embeddings[key]) for article_id, key, _ in batch if key in embeddings]
+                if found:
+                    ids, vectors = zip(*found)
+                    self.index.upsert(list(ids), normalize(np.stack(vectors)))
+            self._synced_until = rows[-1][2]
+
+            if self.index.needs_training and not self._training:
+                self._training = True
+                threading.Thread(target=self._train, name='vector-index-train', daemon=True).start()
+
+    def _train(self):
+        try:
+            with self._lock:
+                vectors = self.index.vectors.copy()
+            centroids = kmeans(vectors, nlist_for(len(vectors)))  # fora do lock: a pesquisa continua
+            with self._lock:
+                self.index.set_centroids(centroids, len(vectors))
+        except Exception:
+            logger.exception("Falha a treinar o índice vetorial")
+        finally:
+            self._training = False
+
+    def search(self, query_vector, k):
+        self.refresh()
+        with self._lock:
+            return self.index.search(query_vector, k)
+
+
+_article_index = None
+_article_index_lock = threading.Lock()
+
+def get_article_index():
+    global _article_index
+    with _article_index_lock:
+        if _article_index is None:
+            _article_index = ArticleVectorIndex()
+    return _article_index
+
+
+def semantic_search(query, k=100):
+    """
+    Artigos mais próximos (semanticamente) da query, por ordem de semelhança.
+    Só para scorers com embeddings (news_supports_embeddings); levanta
+    ScorerUnavailable se o worker de scoring não responder.
+    """
+    from .relevance import news_encode_query
+
+    query_vector = news_encode_query(query)
+    hits = get_article_index().search(query_vector, k)
+    articles = NewsArticle.objects.in_bulk([article_id for article_id, _ in hits])
+    return [articles[article_id] for article_id, _ in hits if article_id in articles]
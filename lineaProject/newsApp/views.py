@@ -1,130 +1,62 @@
 # newsApp/views.py
+# As views só leem da base de dados; os feeds são ingeridos pelo comando
+# `python manage.py news_ingest` (ver newsApp/ingest.py).
 
-import feedparser
+from django.conf import settings
+from django.contrib import messages
 from django.shortcuts import render
-from django.core.paginator import Paginator
-from sentence_transformers import SentenceTransformer, util
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from .ingest import NEWS_GENERATION_KEY
+from .models import NewsArticle
+from .relevance import ScorerUnavailable, news_supports_embeddings
+from .search import search_articles
+from .vector_index import semantic_search
 
-# --- Palavras-chave em inglês e português ---
-keywords = [
-    "art", "painting", "sculpture", "museum", "gallery", "exhibition",
-    "installation", "drawing", "photography", "architecture", "design", "pritzker",
-    "arte", "pintura", "escultura", "museu", "galeria", "exposição",
-    "instalação", "desenho", "fotografia", "arquitetura", "design", "prémio pritzker",
-    "poesia", "poetry", "literatura", "literature", "arquitetura", "arquiteto"
-]
-
-# --- Modelo multilingue ---
-model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-keywords_emb = model.encode(keywords, convert_to_tensor=True)
-
-def news_relevance(texts):
-    """
-    Recebe um texto (string) ou lista de textos.
-    Retorna um score ou lista de scores de relevância.
-    """
-    single_input = False
-    if isinstance(texts, str):
-        texts = [texts]
-        single_input = True
-
-    embs = model.encode(texts, convert_to_tensor=True)
-    similarities = util.cos_sim(embs, keywords_emb).mean(dim=1)
-    scores = similarities.cpu().tolist()
-    return scores[0] if single_input else scores
-
-# --- RSS FEEDS ---
-RSS_FEEDS_INTERNATIONAL = {
-    'the_archpaper': 'https://archpaper.com/feed/',
-    'the_art_newspaper': 'https://www.theartnewspaper.com/rss.xml',
-    'globalvoices': 'https://globalvoices.org/feeds/',
-}
-
-RSS_FEEDS_NATIONAL = {
-    'rtp_noticias_cultura': 'https://www.rtp.pt/noticias/rss/feeds/Cultura',
-    'observador': 'https://observador.pt/seccao/cultura/arte/feed',
-    'cnn': 'https://cnnportugal.iol.pt/rss/arte',
-}
-
-# --- Classe NewsArticle ---
-class NewsArticle:
-    def __init__(self, source, title, link, summary=None, published=None,
-                 published_parsed=None, score=0.0, is_national=False):
-        self.source = source
-        self.title = title
-        self.link = link
-        self.summary = summary
-        self.published = published
-        self.published_parsed = published_parsed
-        self.score = score
-        self.is_national = is_national
-
-# --- Função para buscar artigos ---
-def news_get_articles():
-    articles = []
+# --- View principal ---
+PAGE_SIZE = 10
 
-    # --- Internacionais ---
-    for source, feed in RSS_FEEDS_INTERNATIONAL.items():
-        parsed_feed = feedparser.parse(feed)
-        for entry in parsed_feed.entries:
-            article = NewsArticle(
-                source=source,
-                title=getattr(entry, 'title', 'No title'),
-                link=getattr(entry, 'link', '#'),
-                summary=getattr(entry, 'summary', ''),
-                published=getattr(entry, 'published', ''),
-                published_parsed=getattr(entry, 'published_parsed', None),
-                is_national=False
-            )
-            articles.append(article)
 
-    # --- Nacionais ---
-    for source, feed in RSS_FEEDS_NATIONAL.items():
-        parsed_feed = feedparser.parse(feed)
-        for entry in parsed_feed.entries:
-            article = NewsArticle(
-                source=source,
-                title=getattr(entry, 'title', 'No title'),
-                link=getattr(entry, 'link', '#'),
-                summary=getattr(entry, 'summary', ''),
-                published=getattr(entry, 'published', ''),
-                published_parsed=getattr(entry, 'published_parsed', None),
-                is_national=True
-            )
-            articles.append(article)
+def _index_articles(tab):
+    articles = NewsArticle.objects.all()
 
-    # --- Remover duplicados ---
-    unique = {a.link: a for a in articles}
-    articles = list(unique.values())
+    if tab == "national":
+        articles = articles.filter(is_national=True)
+    elif tab == "international":
+        articles = articles.filter(is_national=False)
+    return articles
 
-    # --- Calcular relevância ---
-    texts = [f"{a.title} {a.summary}" for a in articles]
-    scores = news_relevance(texts)
-    for i, article in enumerate(articles):
-        article.score = scores[i]
 
-    # --- Ordenar por score e data ---
-    articles = sorted(
-        articles,
-        key=lambda x: (x.score, x.published_parsed or x.published or ""),
-        reverse=True
-    )
+def _index_page(tab, page_number):
+    # Paginação feita em SQL (LIMIT/OFFSET); page_number já validado
+    bottom = (page_number - 1) * PAGE_SIZE
+    return list(_index_articles(tab)[bottom:bottom + PAGE_SIZE])
 
-    return articles
 
-# --- View principal ---
 def news_index(request):
     tab = request.GET.get('tab', 'all')
-    articles = news_get_articles()
-
-    if tab == "national":
-        articles = [a for a in articles if a.is_national]
-    elif tab == "international":
-        articles = [a for a in articles if not a.is_national]
-
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(articles, 10)
-    page_obj = paginator.get_page(page_number)
+    if tab not in ('all', 'national', 'international'):
+        tab = 'all'
+
+    # A lista só muda a cada ingestão: cache partilhada com single-flight e
+    # stale-while-revalidate (ver lineaProject/cache.py). Primeiro o total,
+    # para a chave de cada página usar o nº de página válido (page=999 é a
+    # última página, não uma chave nova)
+    generation = cache.get(NEWS_GENERATION_KEY, 0)
+    cache_options = {
+        'timeout': getattr(settings, 'NEWS_INDEX_CACHE_TIMEOUT', 60),
+        'stale_ttl': getattr(settings, 'NEWS_INDEX_CACHE_STALE', 300),
+    }
+    count = cache.get_or_compute(
+        f"news:count:{generation}:{tab}", lambda: _index_articles(tab).count(), **cache_options
+    )
+    paginator = Paginator(_index_articles(tab), PAGE_SIZE)
+    paginator.count = count
+    number = paginator.get_page(request.GET.get('page')).number  # sem query: o total já é conhecido
+    articles = cache.get_or_compute(
+        f"news:index:{generation}:{tab}:{number}", lambda: _index_page(tab, number), **cache_options
+    )
+    page_obj = Page(articles, number, paginator)
 
     return render(request, 'newsApp/index.html', {
         'articles': page_obj.object_list,
@@ -134,11 +66,30 @@ def news_index(request):
 
 # --- View de pesquisa ---
 def news_search(request):
-    query = request.GET.get('q', '').lower()
-    articles = news_get_articles()
-    results = [a for a in articles if query in a.title.lower()]
+    query = request.GET.get('q', '').strip()
+    mode = request.GET.get('mode', 'text')
+
+    results = None
+    if mode == 'semantic' and query:
+        try:
+            if news_supports_embeddings():
+                results = semantic_search(query, k=getattr(settings, 'NEWS_SEMANTIC_TOP_K', 100))
+        except ScorerUnavailable:
+            pass  # worker de scoring em baixo
+        if results is None:
+            # Scorer sem modelo (NEWS_SCORER=keywords) ou indisponível: usa a pesquisa por texto
+            messages.info(request, "Pesquisa semântica indisponível; a mostrar a pesquisa por texto.")
+            mode = 'text'
+    if results is None:
+        results = search_articles(query)
+
+    page_number = request.GET.get('page', 1)
+    paginator = Paginator(results, 10)
+    page_obj = paginator.get_page(page_number)
 
     return render(request, 'newsApp/search_results.html', {
-        'articles': results,
-        'query': query
+        'articles': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+        'mode': mode
     })
@@ -0,0 +1,184 @@
+# postsApp/aggregator.py
+# Agrupamento das notificações de likes e comentários: os eventos ficam num
+# buffer por (destinatário, post, tipo) durante NOTIFICATION_COALESCE_WINDOW
+# segundos e cada grupo é escrito com um único upsert (INSERT ... ON
+# CONFLICT (group_key) DO UPDATE), somando ao grupo ainda não lido:
+# "ana e mais 41 pessoas gostaram do teu post". Os utilizadores de cada grupo
+# ficam em NotificationActor. Um unlike dentro da janela cancela o evento;
+# depois dela, retira o utilizador do grupo não lido a que pertence (e apaga-o
+# se ficar vazio), por isso like/unlike repetidos não duplicam notificações e
+# um unlike de um like já lido não mexe no grupo seguinte.
+# Cada processo tem o seu buffer; os upserts de vários processos somam-se.
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import notifications
+from .models import Notification, NotificationActor
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    'recipient_id', 'sender_id', 'notification_type', 'post_id', 'comment_id',
+    'is_read', 'created_at', 'actor_count', 'group_key',
+)
+
+
+def coalesce_window():
+    return getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 5)
+
+
+def group_key(recipient_id, post_id, notification_type):
+    return f"{notification_type}:{post_id}:{recipient_id}"
+
+
+class Group:
+    def __init__(self, recipient_id, post_id, notification_type):
+        self.recipient_id = recipient_id
+        self.post_id = post_id
+        self.notification_type = notification_type
+        self.actors = {}  # sender_id -> comment_id (ordem de chegada)
+
+    @property
+    def key(self):
+        return group_key(self.recipient_id, self.post_id, self.notification_type)
+
+
+class NotificationAggregator:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._timer = None
+
+    def add(self, recipient_id, sender_id, notification_type, post_id, comment_id=None):
+        if recipient_id == sender_id:  # sem notificações das próprias ações
+            return
+        key = group_key(recipient_id, post_id, notification_type)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = Group(recipient_id, post_id, notification_type)
+            group.actors.pop(sender_id, None)
+            group.actors[sender_id] = comment_id  # o último fica como sender
+            flush_now = coalesce_window() <= 0
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(coalesce_window(), self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def remove(self, recipient_id, sender_id, notification_type, post_id):
+        """Desfaz um evento (ex.: unlike): no buffer, ou no grupo já escrito."""
+        key = group_key(recipient_id, post_id, notification_type)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None and sender_id in group.actors:
+                del group.actors[sender_id]
+                if not group.actors:
+                    del self._groups[key]
+                return
+        retract(key, sender_id)
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Falha a escrever as notificações agrupadas")
+        finally:
+            connection.close()  # a thread do Timer termina aqui
+
+    def flush(self):
+        with self._lock:
+            groups = [g for g in self._groups.values() if g.actors]
+            self._groups = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if groups:
+            write_groups(groups)
+        return len(groups)
+
+
+def _upsert_sql(rows):
+    qn = connection.ops.quote_name
+    table = qn(Notification._meta.db_table)
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(COLUMNS)) + ')'] * rows)
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in COLUMNS)}) VALUES {placeholders} "
+        f"ON CONFLICT ({qn('group_key')}) DO UPDATE SET "
+        f"{qn('actor_count')} = {table}.{qn('actor_count')} + EXCLUDED.{qn('actor_count')}, "
+        f"{qn('sender_id')} = EXCLUDED.{qn('sender_id')}, "
+        f"{qn('comment_id')} = COALESCE(EXCLUDED.{qn('comment_id')}, {table}.{qn('comment_id')}), "
+        f"{qn('created_at')} = EXCLUDED.{qn('created_at')} "
+        f"RETURNING {qn('id')}, {qn('group_key')}, {qn('actor_count')}"
+    )
+
+
+def write_groups(groups):
+    """Um upsert para todos os grupos; os grupos novos contam como não lidos."""
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    for group in groups:
+        sender_id, comment_id = list(group.actors.items())[-1]
+        params += [
+            group.recipient_id, sender_id, group.notification_type, group.post_id, comment_id,
+            False, now, len(group.actors), group.key,
+        ]
+
+    by_key = {group.key: group for group in groups}
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_upsert_sql(len(groups)), params)
+            written = cursor.fetchall()
+        created = [key for _, key, count in written if count == len(by_key[key].actors)]
+        for key in created:
+            notifications.add_unread(by_key[key].recipient_id, 1)
+        actors = [
+            NotificationActor(notification_id=pk, user_id=user_id)
+            for pk, key, _ in written for user_id in by_key[key].actors
+        ]
+        NotificationActor.objects.bulk_create(actors, ignore_conflicts=True)
+        # O upsert somou todos os utilizadores do buffer, mas quem já estava no
+        # grupo (ex.: dois comentários em flushes diferentes) não conta duas vezes
+        distinct = NotificationActor.objects.filter(notification=OuterRef('pk')) \
+            .values('notification').annotate(n=Count('pk')).values('n')
+        Notification.objects.filter(pk__in=[pk for pk, _, _ in written]).update(actor_count=Subquery(distinct))
+
+    pushed = Notification.objects.filter(pk__in=[pk for pk, _, _ in written]).select_related('sender')
+    for notification in pushed:
+        transaction.on_commit(
+            lambda n=notification: notifications.push(
+                n.recipient_id, {'event': 'notification', 'notification': notifications.serialize(n)}
+            ),
+            robust=True,
+        )
+
+
+def retract(key, sender_id):
+    """
+    Tira um utilizador do grupo não lido `key`, se fizer parte dele (um like já
+    lido está noutro grupo, fechado); o grupo vazio é apagado.
+    """
+    with transaction.atomic():
+        removed, _ = NotificationActor.objects.filter(notification__group_key=key, user_id=sender_id).delete()
+        if not removed:
+            return
+        Notification.objects.filter(group_key=key).update(actor_count=F('actor_count') - 1)
+        Notification.objects.filter(group_key=key, actor_count=0).delete()
+        # Se era o último a aparecer, passa a aparecer o último que ficou no grupo
+        latest = NotificationActor.objects.filter(notification=OuterRef('pk')).order_by('-pk').values('user')[:1]
+        Notification.objects.filter(group_key=key, sender_id=sender_id) \
+            .update(sender_id=Coalesce(Subquery(latest), F('sender_id')))
+
+
+aggregator = NotificationAggregator()
+atexit.register(aggregator.flush)
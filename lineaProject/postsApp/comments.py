@@ -0,0 +1,46 @@
+# postsApp/comments.py
+# Comentários em threads: cada resposta guarda o comentário de topo (root),
+# por isso uma página de threads (os comentários de topo + todas as suas
+# respostas) vem numa só query, e a árvore é montada em memória em O(n).
+# A paginação é feita por comentário de topo (cursor, ver pagination.py),
+# dos mais antigos para os mais recentes.
+
+from django.db.models import Q
+
+from .models import Comment
+from .pagination import build_page, decode_cursor, is_backwards, keyset_queryset
+
+
+def build_tree(comments):
+    """
+    Liga cada comentário aos seus filhos (`comment.children`, por ordem de
+    criação) e devolve os que não têm pai na lista.
+    """
+    nodes = {}
+    for comment in comments:
+        comment.children = []
+        nodes[comment.pk] = comment
+
+    roots = []
+    for comment in sorted(comments, key=lambda c: (c.created_at, c.pk)):
+        parent = nodes.get(comment.parent_id)
+        if parent is not None:
+            parent.children.append(comment)
+        elif comment.parent_id is None:
+            roots.append(comment)
+    return roots
+
+
+def comment_threads(post, cursor=None, page_size=20):
+    """CursorPage com as threads (comentários de topo, mais antigos primeiro)."""
+    decoded = decode_cursor(cursor)
+    top_level = keyset_queryset(Comment.objects.filter(post=post, parent__isnull=True), decoded, ascending=True)
+    page_ids = top_level.values('pk')[:page_size + 1]
+
+    comments = list(
+        Comment.objects.filter(Q(pk__in=page_ids) | Q(root__in=page_ids)).select_related('user')
+    )
+    roots = build_tree(comments)
+    # Mesma ordem em que o keyset percorreu os comentários de topo
+    roots.sort(key=lambda c: (c.created_at, c.pk), reverse=is_backwards(decoded))
+    return build_page(roots, decoded, page_size, key=lambda c: (c.created_at, c.pk))
@@ -0,0 +1,52 @@
+# postsApp/consumers.py
+# WebSocket das notificações (ws/notifications/): ao ligar, o utilizador
+# entra no grupo notifications_<id> e recebe o nº de não lidas; depois
+# recebe cada notificação nova e as alterações ao nº de não lidas.
+# Mensagens do cliente: {"action": "mark_read", "ids": [1, 2, ...]}
+# (sem "ids" marca todas). Mensagens inválidas recebem {"event": "error"} e
+# a ligação continua aberta.
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from . import notifications
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        self.user_id = user.pk
+        self.group = notifications.group_name(self.user_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        unread = await database_sync_to_async(notifications.unread_count)(self.user_id)
+        await self.send_json({'event': 'unread', 'unread': unread})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        try:
+            return await super().decode_json(text_data)
+        except ValueError:
+            return None  # rejeitada em receive_json
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict) or content.get('action') != 'mark_read':
+            await self.send_json({'event': 'error', 'error': "Mensagem inválida."})
+            return
+        ids = content.get('ids')
+        if ids is not None and not (isinstance(ids, list) and all(type(i) is int and i > 0 for i in ids)):
+            await self.send_json({'event': 'error', 'error': "'ids' tem de ser uma lista de inteiros."})
+            return
+        # A confirmação chega pelo grupo (evento 'read'), a todas as ligações
+        await database_sync_to_async(notifications.mark_read)(self.user_id, ids)
+
+    async def notification_message(self, event):
+        await self.send_json(event['data'])
@@ -0,0 +1,137 @@
+# postsApp/likes.py
+# Like / unlike idempotentes (PUT / DELETE em posts:like): o INSERT é
+# condicional (ON CONFLICT DO NOTHING) e o DELETE só conta se apagou a
+# linha, por isso cliques repetidos ou concorrentes não duplicam likes nem
+# desacertam o contador. Devolvem (mudou, like_count) sem COUNT.
+# Em PostgreSQL é um único statement (CTE com RETURNING); nas outras bases
+# de dados são 2-3 queries na mesma transação.
+# Estas funções não passam pelos signals de Like: o contador e as
+# notificações são tratados aqui.
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .aggregator import aggregator
+from .models import Like, Notification, Post
+
+
+class PostNotFound(Exception):
+    pass
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return qn(Like._meta.db_table), qn(Post._meta.db_table)
+
+
+def _after_commit(changed, user_id, post_id, creator_id, liked):
+    if not changed:
+        return
+    if liked:
+        transaction.on_commit(lambda: aggregator.add(creator_id, user_id, Notification.NotificationType.LIKE, post_id))
+    else:
+        transaction.on_commit(lambda: aggregator.remove(creator_id, user_id, Notification.NotificationType.LIKE, post_id))
+
+
+def like(user_id, post_id):
+    if connection.vendor == 'postgresql':
+        changed, like_count, creator_id = _like_postgresql(user_id, post_id)
+    else:
+        changed, like_count, creator_id = _like_generic(user_id, post_id)
+    _after_commit(changed, user_id, post_id, creator_id, liked=True)
+    return changed, like_count
+
+
+def unlike(user_id, post_id):
+    if connection.vendor == 'postgresql':
+        changed, like_count, creator_id = _unlike_postgresql(user_id, post_id)
+    else:
+        changed, like_count, creator_id = _unlike_generic(user_id, post_id)
+    _after_commit(changed, user_id, post_id, creator_id, liked=False)
+    return changed, like_count
+
+
+def _like_postgresql(user_id, post_id):
+    likes, posts = _tables()
+    sql = f"""
+        WITH ins AS (
+            INSERT INTO {likes} (user_id, post_id, created_at) VALUES (%s, %s, %s)
+            ON CONFLICT (user_id, post_id) DO NOTHING
+            RETURNING 1
+        )
+        UPDATE {posts} SET like_count = like_count + (SELECT COUNT(*) FROM ins),
+                           version = version + (SELECT COUNT(*) FROM ins)
+        WHERE id = %s
+        RETURNING (SELECT COUNT(*) FROM ins), like_count, creator_id
+    """
+    # As FKs são DEFERRABLE INITIALLY DEFERRED: dentro de uma transação o
+    # INSERT de um like num post que não existe só falharia no COMMIT. O
+    # savepoint desfaz o INSERT antes do PostNotFound.
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user_id, post_id, timezone.now(), post_id])
+                row = cursor.fetchone()
+            if row is None:
+                raise PostNotFound(post_id)
+    except IntegrityError:  # FK verificada no fim do bloco: o post não existe
+        raise PostNotFound(post_id)
+    return bool(row[0]), row[1], row[2]
+
+
+def _unlike_postgresql(user_id, post_id):
+    likes, posts = _tables()
+    sql = f"""
+        WITH del AS (
+            DELETE FROM {likes} WHERE user_id = %s AND post_id = %s
+            RETURNING 1
+        )
+        UPDATE {posts} SET like_count = GREATEST(like_count - (SELECT COUNT(*) FROM del), 0),
+                           version = version + (SELECT COUNT(*) FROM del)
+        WHERE id = %s
+        RETURNING (SELECT COUNT(*) FROM del), like_count, creator_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, post_id, post_id])
+        row = cursor.fetchone()
+    if row is None:
+        raise PostNotFound(post_id)
+    return bool(row[0]), row[1], row[2]
+
+
+def _like_generic(user_id, post_id):
+    likes, _ = _tables()
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    with transaction.atomic():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {likes} (user_id, post_id, created_at) VALUES (%s, %s, %s) "
+                    f"ON CONFLICT (user_id, post_id) DO NOTHING",
+                    [user_id, post_id, created_at],
+                )
+                changed = cursor.rowcount == 1
+        except IntegrityError:  # FK (bases de dados que a verificam logo)
+            raise PostNotFound(post_id)
+        return (changed, *_update_count(post_id, 1 if changed else 0))
+
+
+def _unlike_generic(user_id, post_id):
+    likes, _ = _tables()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {likes} WHERE user_id = %s AND post_id = %s", [user_id, post_id])
+            changed = cursor.rowcount == 1
+        return (changed, *_update_count(post_id, -1 if changed else 0))
+
+
+def _update_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta:
+        posts.update(like_count=Greatest(F('like_count') + delta, 0), version=F('version') + 1)
+    row = posts.values_list('like_count', 'creator_id').first()
+    if row is None:
+        raise PostNotFound(post_id)  # desfaz o INSERT (FK adiada em SQLite)
+    return row
@@ -0,0 +1,74 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from lineaProject.media_views import serve_media
+from postsApp.models import Media
+
+
+def consume(response):
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    response.close()
+    return len(body)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de servir media: django.views.static.serve (anterior) vs "
+        "lineaProject.media_views.serve_media (pedido completo, seek com Range "
+        "e revalidação com If-None-Match)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help="Caminho relativo a MEDIA_ROOT (por omissão: a maior media).")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        name = options['file'] or self.largest_media()
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.isfile(path):
+            raise CommandError(f"{name}: ficheiro não encontrado em MEDIA_ROOT.")
+        size = os.path.getsize(path)
+        self.stdout.write(f"{name} ({size / 1024 / 1024:.1f} MB)")
+
+        factory = RequestFactory()
+        url = settings.MEDIA_URL + name
+        etag = serve_media(factory.get(url), name)['ETag']
+        seek = {'HTTP_RANGE': f'bytes={size // 2}-{size // 2 + 256 * 1024 - 1}'}
+        scenarios = [
+            ('completo', {}),
+            ('seek (Range 256 KB)', seek),
+            ('revalidação', {'HTTP_IF_NONE_MATCH': etag}),
+        ]
+
+        views = [
+            ('static.serve', lambda request: serve(request, name, document_root=settings.MEDIA_ROOT)),
+            ('serve_media', lambda request: serve_media(request, name)),
+        ]
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX=''):
+            for label, headers in scenarios:
+                self.stdout.write(label)
+                for view_name, view in views:
+                    self.run(view_name, view, factory.get(url, **headers), options['repeat'])
+
+    def run(self, label, view, request, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            response = view(request)
+            sent = consume(response)
+        elapsed = (time.perf_counter() - start) / repeat
+        self.stdout.write(
+            f"  {label:<14} {elapsed * 1000:8.2f} ms  status {response.status_code}  "
+            f"{sent / 1024:10.1f} KB  Cache-Control: {response.get('Cache-Control', '-')}"
+        )
+
+    def largest_media(self):
+        names = Media.objects.values_list('file', flat=True).distinct()
+        existing = [n for n in names if os.path.isfile(os.path.join(settings.MEDIA_ROOT, n))]
+        if not existing:
+            raise CommandError("Sem media para o benchmark (usar --file).")
+        return max(existing, key=lambda n: os.path.getsize(os.path.join(settings.MEDIA_ROOT, n)))
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from postsApp.models import Media, MediaBlob
+from postsApp.storage import TEMP_DIR, hashed_name, is_hashed_name, media_storage, sha256_of, sniff_mime
+
+
+class Command(BaseCommand):
+    help = (
+        "Move as media antigas para nomes endereçados pelo conteúdo (sha256), "
+        "juntando os ficheiros duplicados, recalcula MediaBlob.ref_count e apaga "
+        "os uploads temporários abandonados (tmp/*.part)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria feito.")
+        parser.add_argument(
+            '--tmp-age', type=int, default=3600,
+            help="Idade mínima (segundos) de um temporário para ser apagado (uploads em curso ficam).",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        legacy = Media.objects.order_by().values_list('file', flat=True).distinct()
+        moved = merged = missing = 0
+        freed = 0
+
+        for name in [n for n in legacy if not is_hashed_name(n)]:
+            if not media_storage.exists(name):
+                missing += 1
+                self.stderr.write(f"{name}: ficheiro em falta")
+                continue
+
+            with media_storage.open(name) as content:
+                sha256 = sha256_of(content)
+                mime = sniff_mime(content)
+            target = hashed_name(sha256, mime)
+            duplicate = media_storage.exists(target)
+            self.stdout.write(f"{name} -> {target}{' (duplicado)' if duplicate else ''}")
+            if dry_run:
+                continue
+
+            if duplicate:
+                freed += media_storage.size(name)
+                merged += 1
+            else:
+                moved += 1
+            with transaction.atomic():
+                Media.objects.filter(file=name).update(file=target)
+                MediaBlob.objects.filter(name=name).delete()
+            if duplicate:
+                media_storage.delete(name)
+            else:
+                media_storage.promote(name, sha256, mime)
+
+        if not dry_run:
+            self._recount()
+        temps = self._sweep_tmp(options['tmp_age'], dry_run)
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} movidos, {merged} duplicados removidos ({freed / 1024 / 1024:.1f} MB), "
+            f"{missing} em falta, {temps} temporários apagados."
+        ))
+
+    def _sweep_tmp(self, max_age, dry_run):
+        if not media_storage.exists(TEMP_DIR):
+            return 0
+        cutoff = time.time() - max_age
+        swept = 0
+        for file_name in media_storage.listdir(TEMP_DIR)[1]:
+            name = f"{TEMP_DIR}/{file_name}"
+            if media_storage.get_modified_time(name).timestamp() > cutoff:
+                continue
+            self.stdout.write(f"{name}: temporário abandonado")
+            swept += 1
+            if not dry_run:
+                media_storage.delete(name)
+        return swept
+
+    def _recount(self):
+        counts = dict(Media.objects.order_by().values_list('file').annotate(c=Count('*')))
+        with transaction.atomic():
+            MediaBlob.objects.exclude(name__in=counts).update(ref_count=0)
+            for name, count in counts.items():
+                MediaBlob.objects.update_or_create(name=name, defaults={'ref_count': count})
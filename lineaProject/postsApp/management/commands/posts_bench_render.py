@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from postsApp.models import Post
+from postsApp.pagination import CursorPage
+
+DUMMY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def private_cache():
+    """TieredCache sobre uma LocMemCache só do benchmark: a cache partilhada real não é tocada."""
+    suffix = time.time_ns()  # começa vazia (cache fria)
+    return {
+        'default': {
+            'BACKEND': 'lineaProject.cache.TieredCache',
+            'LOCATION': f'bench-{suffix}',
+            'OPTIONS': {'SHARED': 'shared'},
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'bench-shared-{suffix}'},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark da renderização do feed: sem cache de fragmentos, com a "
+        "cache fria (1ª renderização) e com a cache quente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10, help="Posts por página.")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--user', help="Username do leitor (por omissão: o autor do post mais recente).")
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.select_related('creator').prefetch_related('media')[:options['posts']])
+        if not posts:
+            raise CommandError("Sem posts para o benchmark.")
+        viewer = posts[0].creator
+        if options['user']:
+            viewer = get_user_model().objects.filter(username=options['user']).first()
+            if viewer is None:
+                raise CommandError(f"Utilizador {options['user']} não existe.")
+        posts = list(
+            Post.objects.filter(pk__in=[p.pk for p in posts]).select_related('creator')
+            .prefetch_related('media').with_viewer_state(viewer)
+        )
+        for post in posts:
+            list(post.media.all())  # os dados já carregados: mede-se só o template
+
+        request = RequestFactory().get('/postsApp/')
+        request.user = viewer
+        context = {'posts': posts, 'page': CursorPage(posts), 'user': viewer}
+
+        def render():
+            return render_to_string('postsApp/feed.html', context, request=request)
+
+        self.stdout.write(f"{len(posts)} posts por página")
+        with override_settings(CACHES=DUMMY_CACHE):
+            self.report('sem cache', self.timed(render, options['repeat']))
+
+        with override_settings(CACHES=private_cache()):
+            self.report('cache fria', self.timed(render, 1))
+            self.report('cache quente', self.timed(render, options['repeat']))
+
+    def timed(self, fn, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat
+
+    def report(self, label, elapsed):
+        self.stdout.write(f"  {label:<13} {elapsed * 1000:8.2f} ms/página")
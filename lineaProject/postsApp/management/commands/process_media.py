@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from postsApp.media_processing import process_media
+from postsApp.models import Media
+
+
+class Command(BaseCommand):
+    help = "Gera as versões (thumbnail/feed/full) das Media pendentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Corre continuamente (worker).")
+        parser.add_argument('--interval', type=int, default=5, help="Segundos entre verificações no modo --loop.")
+        parser.add_argument('--retry-failed', action='store_true', help="Volta a tentar as Media com falha.")
+
+    def handle(self, *args, **options):
+        statuses = [Media.Status.PENDING]
+        if options['retry_failed']:
+            statuses.append(Media.Status.FAILED)
+
+        while True:
+            ids = list(Media.objects.filter(status__in=statuses).values_list('id', flat=True)[:100])
+            for media_id in ids:
+                status = process_media(media_id)
+                self.stdout.write(f"Media {media_id}: {status}")
+
+            if not options['loop']:
+                break
+            statuses = [Media.Status.PENDING]  # as falhadas só são repetidas uma vez
+            if not ids:
+                time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from postsApp.models import Comment, Like, Post
+
+
+def _count_subquery(model):
+    counts = model.objects.filter(post=OuterRef('pk')).order_by().values('post') \
+        .annotate(c=Count('*')).values('c')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = "Recalcula Post.like_count / Post.comment_count e corrige os desvios."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra os posts com desvio.")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Post.objects.annotate(real_likes=_count_subquery(Like), real_comments=_count_subquery(Comment))
+            .filter(~Q(like_count=F('real_likes')) | ~Q(comment_count=F('real_comments')))
+            .only('id', 'like_count', 'comment_count')
+        )
+
+        for post in drifted:
+            self.stdout.write(
+                f"Post {post.id}: likes {post.like_count} -> {post.real_likes}, "
+                f"comentários {post.comment_count} -> {post.real_comments}"
+            )
+            post.like_count = post.real_likes
+            post.comment_count = post.real_comments
+
+        if not options['dry_run']:
+            Post.objects.bulk_update(drifted, ['like_count', 'comment_count'], batch_size=500)
+            Post.objects.filter(pk__in=[post.pk for post in drifted]).update(version=F('version') + 1)
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} posts com desvio."))
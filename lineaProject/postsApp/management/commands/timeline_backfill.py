@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from postsApp.models import Follow, Post, TimelineEntry
+from postsApp.timeline import BATCH_SIZE, backfill_follow
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche a timeline materializada (posts próprios + de quem se segue). "
+        "Usar depois de ativar as timelines ou quando uma conta deixa de ser celebridade."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Só a timeline deste username.")
+        parser.add_argument('--limit', type=int, default=None, help="Máx. de posts por conta seguida.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"Utilizador {options['user']!r} não existe.")
+
+        total = 0
+        for user in users.iterator():
+            # Posts do próprio utilizador
+            own = Post.objects.filter(creator=user).values_list('id', 'created_at')
+            entries = [TimelineEntry(user=user, post_id=pk, created_at=created_at) for pk, created_at in own]
+            TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            total += len(entries)
+
+            # Posts de quem segue
+            for followed_id in Follow.objects.filter(follower=user).values_list('followed_id', flat=True):
+                total += backfill_follow(user.id, followed_id, limit=options['limit'])
+
+        self.stdout.write(self.style.SUCCESS(f"{total} entradas verificadas."))
@@ -0,0 +1,166 @@
+# postsApp/media_processing.py
+# Processamento das imagens dos posts fora do pedido: o upload só grava o
+# original e a Media fica 'pending'; um pool de threads gera as versões
+# (thumbnail / feed / full) em WebP ou JPEG, sem EXIF, e guarda as dimensões.
+# O original de uma imagem nunca é servido; o de um vídeo é, por isso os
+# metadados (GPS, câmara) são apagados no upload (strip_video_metadata).
+# `python manage.py process_media` processa o que ficou pendente (ex.: após
+# um restart) e pode correr como worker dedicado (--loop).
+
+import io
+import logging
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from .models import Media, Post
+
+logger = logging.getLogger(__name__)
+
+# nome do campo -> maior lado (px)
+RENDITIONS = {
+    'thumbnail': 320,
+    'feed_image': 720,
+    'full_image': 1600,
+}
+FORMATS = {
+    'WEBP': ('webp', {'quality': 80, 'method': 4}),
+    'JPEG': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'POST_MEDIA_WORKERS', 2),
+                thread_name_prefix='media',
+            )
+    return _executor
+
+
+def enqueue(media_ids):
+    """Agenda o processamento (depois do commit, para as linhas já existirem)."""
+    if not getattr(settings, 'POST_MEDIA_PROCESS_IN_BACKGROUND', True):
+        return  # fica 'pending' para o worker `manage.py process_media`
+    media_ids = list(media_ids)
+    transaction.on_commit(lambda: _get_executor().submit(_run, media_ids))
+
+
+def _run(media_ids):
+    try:
+        for media_id in media_ids:
+            process_media(media_id)
+    finally:
+        close_old_connections()
+
+
+def _render(image, max_side, fmt):
+    extension, options = FORMATS[fmt]
+    rendition = image.copy()
+    rendition.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    # Sem passar exif=..., o Pillow não escreve metadados EXIF
+    rendition.save(buffer, fmt, **options)
+    return extension, buffer.getvalue()
+
+
+def process_media(media_id):
+    """Gera as versões de uma Media. Devolve o estado final."""
+    try:
+        media = Media.objects.get(pk=media_id)
+    except Media.DoesNotExist:
+        return None
+
+    if media.media_type != Media.MediaType.IMAGE:
+        # Vídeos são servidos como foram enviados
+        media.status = Media.Status.READY
+        media.save(update_fields=['status'])
+        return media.status
+
+    fmt = getattr(settings, 'POST_MEDIA_RENDITION_FORMAT', 'WEBP')
+    written = []
+    try:
+        with media.file.open('rb') as f, Image.open(f) as original:
+            image = ImageOps.exif_transpose(original)  # aplica a orientação antes de remover o EXIF
+            if image.mode not in ('RGB', 'RGBA') or (fmt == 'JPEG' and image.mode != 'RGB'):
+                image = image.convert('RGB')
+            media.width, media.height = image.size
+
+            for field, max_side in RENDITIONS.items():
+                extension, data = _render(image, max_side, fmt)
+                getattr(media, field).save(f"{media.pk}_{field}.{extension}", ContentFile(data), save=False)
+                written.append(field)
+
+        media.status = Media.Status.READY
+    except Exception:
+        logger.exception("Falha ao processar a Media %s", media_id)
+        # Não ficam versões soltas no disco
+        for field in written:
+            getattr(media, field).delete(save=False)
+            setattr(media, field, '')
+        media.status = Media.Status.FAILED
+
+    media.save(update_fields=['status', 'width', 'height', *RENDITIONS])
+    Post.objects.filter(pk=media.post_id).update(version=F('version') + 1)  # cartão com as novas imagens
+    return media.status
+
+
+# --- Metadados dos vídeos (MP4 / MOV) ---
+# GPS, modelo da câmara, etc. ficam nas caixas udta/meta dentro de moov (e
+# de cada trak). São apagadas no próprio ficheiro, sem mudar o tamanho: o
+# tipo passa a 'free' (ignorada pelos leitores) e o conteúdo a zeros.
+BMFF_CONTAINERS = {b'moov', b'trak'}
+BMFF_METADATA = {b'udta', b'meta'}
+
+
+def _boxes(f, start, end):
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack('>I4s', f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:  # até ao fim
+            size = end - pos
+        if size < header_size or pos + size > end:
+            return  # estrutura inválida: pára
+        yield pos, kind, header_size, size
+        pos += size
+
+
+def strip_video_metadata(path):
+    """Apaga os metadados de um MP4/MOV (no lugar). Devolve True se o ficheiro mudou."""
+    changed = False
+    with open(path, 'r+b') as f:
+        def walk(start, end):
+            nonlocal changed
+            for pos, kind, header_size, size in list(_boxes(f, start, end)):
+                if kind in BMFF_METADATA:
+                    f.seek(pos + 4)
+                    f.write(b'free')
+                    f.seek(pos + header_size)
+                    remaining = size - header_size
+                    while remaining:
+                        n = min(remaining, 64 * 1024)
+                        f.write(bytes(n))
+                        remaining -= n
+                    changed = True
+                elif kind in BMFF_CONTAINERS:
+                    walk(pos + header_size, pos + size)
+
+        walk(0, f.seek(0, os.SEEK_END))
+    return changed
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:16
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('postsApp', 'Post')
+    Like = apps.get_model('postsApp', 'Like')
+    Comment = apps.get_model('postsApp', 'Comment')
+    db_alias = schema_editor.connection.alias
+
+    def count(model):
+        counts = model.objects.filter(post=OuterRef('pk')).order_by().values('post') \
+            .annotate(c=Count('*')).values('c')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Post.objects.using(db_alias).update(like_count=count(Like), comment_count=count(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_follower_count(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Follow = apps.get_model('postsApp', 'Follow')
+    db_alias = schema_editor.connection.alias
+    counts = Follow.objects.filter(followed=OuterRef('pk')).order_by().values('followed') \
+        .annotate(c=Count('*')).values('c')
+    User.objects.using(db_alias).update(follower_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0003_post_keyset_indexes'),
+        ('authenticationApp', '0004_userprofile_follower_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='postsApp.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(fill_follower_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0004_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='feed_image',
+            field=models.FileField(blank=True, upload_to='posts/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='full_image',
+            field=models.FileField(blank=True, upload_to='posts/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='thumbnail',
+            field=models.FileField(blank=True, upload_to='posts/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
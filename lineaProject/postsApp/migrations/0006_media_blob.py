@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:23
+
+import postsApp.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_blobs(apps, schema_editor):
+    # Ficheiros antigos (nomes não endereçados) passam a ter contagem de
+    # referências; `python manage.py media_dedupe` junta os duplicados.
+    Media = apps.get_model('postsApp', 'Media')
+    MediaBlob = apps.get_model('postsApp', 'MediaBlob')
+    db_alias = schema_editor.connection.alias
+    counts = Media.objects.using(db_alias).order_by().values('file').annotate(c=Count('*'))
+    MediaBlob.objects.using(db_alias).bulk_create(
+        [MediaBlob(name=row['file'], ref_count=row['c']) for row in counts],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0005_media_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='media',
+            name='file',
+            field=models.FileField(storage=postsApp.storage.ContentAddressedStorage(), upload_to='posts/media/'),
+        ),
+        migrations.RunPython(fill_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_root(apps, schema_editor):
+    Comment = apps.get_model('postsApp', 'Comment')
+    db_alias = schema_editor.connection.alias
+    parents = dict(Comment.objects.using(db_alias).filter(parent__isnull=False).values_list('id', 'parent_id'))
+
+    def root_of(comment_id):
+        while comment_id in parents:
+            comment_id = parents[comment_id]
+        return comment_id
+
+    replies = [Comment(id=comment_id, root_id=root_of(comment_id)) for comment_id in parents]
+    Comment.objects.using(db_alias).bulk_update(replies, ['root'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0006_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread', to='postsApp.comment'),
+        ),
+        migrations.RunPython(fill_root, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:27
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_unread_notification_count(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Notification = apps.get_model('postsApp', 'Notification')
+    db_alias = schema_editor.connection.alias
+    counts = Notification.objects.filter(recipient=OuterRef('pk'), is_read=False).order_by() \
+        .values('recipient').annotate(c=Count('*')).values('c')
+    User.objects.using(db_alias).update(
+        unread_notification_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0007_comment_root'),
+        ('authenticationApp', '0005_userprofile_unread_notification_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_unread_notification_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def fill_timelines(apps, schema_editor):
+    """
+    A 0004 criou a TimelineEntry vazia: sem isto os utilizadores existentes
+    ficavam com o feed vazio até alguém correr o timeline_backfill. Mesmas
+    regras do comando: os posts próprios e os posts recentes de quem se segue
+    (as celebridades entram na leitura, ver postsApp/timeline.py).
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Follow = apps.get_model('postsApp', 'Follow')
+    Post = apps.get_model('postsApp', 'Post')
+    TimelineEntry = apps.get_model('postsApp', 'TimelineEntry')
+    db_alias = schema_editor.connection.alias
+    max_followers = getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 10000)
+    limit = getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+
+    celebrities = set(
+        User.objects.using(db_alias).filter(follower_count__gte=max_followers).values_list('id', flat=True)
+    )
+    recent = {}  # autor -> [(post_id, created_at)] mais recentes
+
+    def posts_of(creator_id, limit=None):
+        if creator_id not in recent:
+            posts = Post.objects.using(db_alias).filter(creator_id=creator_id) \
+                .order_by('-created_at', '-id').values_list('id', 'created_at')
+            recent[creator_id] = list(posts[:limit] if limit else posts)
+        return recent[creator_id]
+
+    batch = []
+    for user_id in User.objects.using(db_alias).values_list('id', flat=True).iterator():
+        own = Post.objects.using(db_alias).filter(creator_id=user_id).values_list('id', 'created_at')
+        batch += [TimelineEntry(user_id=user_id, post_id=pk, created_at=created_at) for pk, created_at in own]
+        followed = Follow.objects.using(db_alias).filter(follower_id=user_id).values_list('followed_id', flat=True)
+        for followed_id in followed:
+            if followed_id in celebrities:
+                continue
+            batch += [
+                TimelineEntry(user_id=user_id, post_id=pk, created_at=created_at)
+                for pk, created_at in posts_of(followed_id, limit)
+            ]
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.using(db_alias).bulk_create(batch, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.using(db_alias).bulk_create(batch, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postsApp', '0012_notification_actor'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,28 @@
 from django.db import models
 from django.conf import settings
+from .storage import media_storage
 
 # Create your models here.
 
+class PostQuerySet(models.QuerySet):
+    def with_viewer_state(self, user):
+        """
+        Anota `liked_by_me` e `is_following_creator` para o utilizador que vê
+        a página (subqueries EXISTS na mesma query, sem uma query por post).
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                liked_by_me=models.Value(False, output_field=models.BooleanField()),
+                is_following_creator=models.Value(False, output_field=models.BooleanField()),
+            )
+        return self.annotate(
+            liked_by_me=models.Exists(Like.objects.filter(post=models.OuterRef('pk'), user=user)),
+            is_following_creator=models.Exists(
+                Follow.objects.filter(follower=user, followed=models.OuterRef('creator'))
+            ),
+        )
+
+
 class Post(models.Model):
     class ContentType(models.TextChoices):
         TEXT = 'text', 'Text'
@@ -12,25 +32,51 @@ class Post(models.Model):
     creator = models.ForeignKey(
         settings.AUTH_USER_MODEL,          # refere-se a UserProfile
         on_delete=models.CASCADE,
-        related_name='posts'
+        related_name='posts',
+        db_index=False,  # coberto por post_creator_feed_idx
     )
     description = models.TextField(blank=True)
     content_type = models.CharField(max_length=10, choices=ContentType.choices)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Contadores desnormalizados (atualizados em postsApp/signals.py)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Sobe a cada alteração que muda o cartão do post (edição, likes,
+    # comentários, media processada): faz parte da chave da cache do
+    # template (_post_card.html), por isso a cache nunca é invalidada
+    version = models.PositiveIntegerField(default=1)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Paginação por cursor (ver postsApp/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+            models.Index(fields=['creator', '-created_at', '-id'], name='post_creator_feed_idx'),
+        ]
 
     def __str__(self):
         return f"Post by {self.creator.username} ({self.content_type})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        # Edição: incrementa na própria UPDATE (não escreve uma versão antiga)
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
     @property
     def likes_count(self):
-        return self.likes.count()
+        return self.like_count
 
     @property
     def comments_count(self):
-        return self.comments.count()
+        return self.comment_count
 
 
 
@@ -39,21 +85,63 @@ class Media(models.Model):
         IMAGE = 'image', 'Image'
         VIDEO = 'video', 'Video'
 
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
         related_name='media'
     )
-    file = models.FileField(upload_to='posts/media/')
+    file = models.FileField(upload_to='posts/media/', storage=media_storage)  # endereçado pelo sha256
     media_type = models.CharField(max_length=10, choices=MediaType.choices)
     order = models.PositiveIntegerField(default=0)  # útil para carrosséis
 
+    # Preenchidos em background (ver postsApp/media_processing.py)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    thumbnail = models.FileField(upload_to='posts/renditions/', blank=True)
+    feed_image = models.FileField(upload_to='posts/renditions/', blank=True)
+    full_image = models.FileField(upload_to='posts/renditions/', blank=True)
+
     class Meta:
         ordering = ['order']
 
     def __str__(self):
         return f"{self.media_type} for Post {self.post.id}"
 
+    def _url(self, rendition):
+        # O original de uma imagem nunca é mostrado (pode ter EXIF com GPS):
+        # enquanto as versões não estão prontas (ou se falharam) não há URL
+        field = getattr(self, rendition)
+        return field.url if field else ''
+
+    @property
+    def thumbnail_url(self):
+        return self._url('thumbnail')
+
+    @property
+    def feed_url(self):
+        return self._url('feed_image')
+
+    @property
+    def full_url(self):
+        return self._url('full_image')
+
+
+
+class MediaBlob(models.Model):
+    # Nº de Media que usam cada ficheiro (o ficheiro é partilhado por uploads iguais)
+    name = models.CharField(max_length=255, unique=True)  # = Media.file.name
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
 
 
 class Like(models.Model):
@@ -81,7 +169,8 @@ class Comment(models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_index=False,  # coberto por comment_post_idx
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -97,35 +186,83 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='replies'
     )
+    # Comentário de topo da thread (None nos de topo): uma thread inteira
+    # carrega-se com uma query (ver postsApp/comments.py)
+    root = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='thread'
+    )
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Comentários de um post por data (threads paginadas, ver postsApp/comments.py)
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username}: {self.text[:30]}"
 
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.root_id:
+            self.root_id = self.parent.root_id or self.parent_id
+        super().save(*args, **kwargs)
+
 
 
 class Follow(models.Model):
     follower = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='following'
+        related_name='following',
+        db_index=False,  # coberto pelo unique_together
     )
     followed = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='followers'
+        related_name='followers',
+        db_index=False,  # coberto por follow_followed_idx
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ('follower', 'followed')
+        indexes = [
+            # Seguidores de um utilizador (fan-out, ver postsApp/timeline.py): só lê o índice
+            models.Index(fields=['followed', 'follower'], name='follow_followed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.follower.username} → {self.followed.username}"
     
 
+class TimelineEntry(models.Model):
+    # Timeline materializada (fan-out on write, ver postsApp/timeline.py)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    created_at = models.DateTimeField()  # = post.created_at
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.user_id}'s timeline"
+
+
 class Notification(models.Model):
     class NotificationType(models.TextChoices):
         LIKE = 'like', 'Like'
@@ -135,7 +272,8 @@ class Notification(models.Model):
     recipient = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='notifications'
+        related_name='notifications',
+        db_index=False,  # coberto por notification_recipient_idx
     )
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -152,16 +290,59 @@ class Notification(models.Model):
     )
     comment = models.ForeignKey(
         Comment,
-        on_delete=models.CASCADE,
+        on_delete=models.SET_NULL,  # numa notificação agrupada é só o último comentário
         null=True,
         blank=True,
         related_name='notifications'
     )
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Agrupamento (ver postsApp/aggregator.py): nº de utilizadores na
+    # notificação (sender é o último) e chave do grupo enquanto não for lida
+    actor_count = models.PositiveIntegerField(default=1)
+    group_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Lista de notificações (views.notification_list)
+            models.Index(fields=['recipient', '-created_at'], name='notification_recipient_idx'),
+            # Só as não lidas (mark_read), uma pequena parte da tabela
+            models.Index(
+                fields=['recipient', '-created_at'], condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.sender.username} → {self.recipient.username} ({self.notification_type})"
+
+    # (singular, plural)
+    VERBS = {
+        NotificationType.LIKE: ("gostou do teu post", "gostaram do teu post"),
+        NotificationType.COMMENT: ("comentou o teu post", "comentaram o teu post"),
+        NotificationType.FOLLOW: ("começou a seguir-te", "começaram a seguir-te"),
+    }
+
+    @property
+    def message(self):
+        """Ex.: "ana e mais 41 pessoas gostaram do teu post"."""
+        singular, plural = self.VERBS.get(self.notification_type, (self.notification_type,) * 2)
+        others = self.actor_count - 1
+        if others <= 0:
+            return f"{self.sender.username} {singular}"
+        return f"{self.sender.username} e mais {others} {'pessoa' if others == 1 else 'pessoas'} {plural}"
+
+
+class NotificationActor(models.Model):
+    """Utilizadores de uma notificação agrupada (ver postsApp/aggregator.py)."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actors')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'user'], name='notification_actor_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in notification {self.notification_id}"
@@ -0,0 +1,87 @@
+# postsApp/notifications.py
+# Notificações de likes, comentários e follows (criadas em signals.py; as de
+# likes e comentários são agrupadas em aggregator.py).
+# O nº de não lidas fica em UserProfile.unread_notification_count (UPDATE
+# atómico, sem COUNT) e cada alteração é enviada por WebSocket ao grupo do
+# destinatário (ver consumers.py), depois do commit.
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Notification
+
+
+def group_name(user_id):
+    return f"notifications_{user_id}"
+
+
+def unread_count(user_id):
+    return get_user_model().objects.filter(pk=user_id) \
+        .values_list('unread_notification_count', flat=True).first() or 0
+
+
+def add_unread(user_id, delta):
+    get_user_model().objects.filter(pk=user_id) \
+        .update(unread_notification_count=Greatest(F('unread_notification_count') + delta, 0))
+
+
+def serialize(notification):
+    return {
+        'id': notification.id,
+        'type': notification.notification_type,
+        'sender': notification.sender.username,
+        'post': notification.post_id,
+        'comment': notification.comment_id,
+        'is_read': notification.is_read,
+        'actor_count': notification.actor_count,
+        'message': notification.message,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def push(user_id, data):
+    """Envia `data` às ligações WebSocket abertas do utilizador (se houver channel layer)."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    data['unread'] = unread_count(user_id)
+    async_to_sync(channel_layer.group_send)(group_name(user_id), {'type': 'notification.message', 'data': data})
+
+
+def notify(recipient_id, sender, notification_type, post=None, comment=None):
+    if recipient_id == sender.pk:  # sem notificações das próprias ações
+        return None
+    notification = Notification.objects.create(
+        recipient_id=recipient_id, sender=sender, notification_type=notification_type,
+        post=post, comment=comment,
+    )
+    add_unread(recipient_id, 1)
+    transaction.on_commit(
+        lambda: push(recipient_id, {'event': 'notification', 'notification': serialize(notification)}),
+        robust=True,  # falhas no channel layer não afetam o pedido
+    )
+    return notification
+
+
+def mark_read(user_id, ids=None):
+    """Marca como lidas as notificações `ids` do utilizador (todas se None). Devolve quantas mudaram."""
+    with transaction.atomic():
+        unread = Notification.objects.filter(recipient_id=user_id, is_read=False)
+        if ids is not None:
+            unread = unread.filter(pk__in=ids)
+        updated = unread.update(is_read=True, group_key=None)  # grupos lidos fecham
+        if updated:
+            add_unread(user_id, -updated)
+    if updated:
+        transaction.on_commit(lambda: push(user_id, {'event': 'read', 'ids': ids}), robust=True)
+    return updated
+
+
+def notification_deleted(notification):
+    # Notificações não lidas apagadas (ex.: em CASCADE com o post)
+    if not notification.is_read:
+        add_unread(notification.recipient_id, -1)
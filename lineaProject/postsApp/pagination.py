@@ -0,0 +1,141 @@
+# postsApp/pagination.py
+# Paginação por cursor (keyset) sobre (created_at, id), sem OFFSET nem COUNT:
+# cada página é um range scan no índice, com o mesmo custo em qualquer
+# profundidade. Os cursores são opacos para o cliente (base64).
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+NEXT = 'n'
+PREVIOUS = 'p'
+MAX_PK = 2 ** 63
+
+
+def encode_cursor(direction, created_at, pk):
+    raw = f"{direction}|{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Devolve (direção, created_at, pk) ou None se o cursor for inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        direction, created_at, pk = raw.split('|')
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+        # Os cursores gerados têm sempre fuso horário e um id positivo (bigint)
+        if timezone.is_naive(created_at) or not 0 < pk < MAX_PK:
+            return None
+        return direction, created_at, pk
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def is_backwards(decoded):
+    return decoded is not None and decoded[0] == PREVIOUS
+
+
+def keyset_queryset(queryset, decoded, fields=('created_at', 'pk'), ascending=False):
+    """
+    `queryset` filtrado a partir do cursor e ordenado pela ordem em que é
+    percorrido: decrescente (primeira página / seguinte) ou crescente
+    (anterior); com ascending=True, ao contrário (mais antigos primeiro).
+    `fields` são os dois campos da chave (data, desempate).
+    """
+    date_field, tie_field = fields
+    descending_order = (f'-{date_field}', f'-{tie_field}')
+    ascending_order = (date_field, tie_field)
+    if decoded is None:
+        return queryset.order_by(*(ascending_order if ascending else descending_order))
+
+    direction, created_at, pk = decoded
+    if (direction == NEXT) != ascending:
+        return queryset.filter(
+            Q(**{f'{date_field}__lt': created_at}) | Q(**{f'{tie_field}__lt': pk}),
+            **{f'{date_field}__lte': created_at},
+        ).order_by(*descending_order)
+    return queryset.filter(
+        Q(**{f'{date_field}__gt': created_at}) | Q(**{f'{tie_field}__gt': pk}),
+        **{f'{date_field}__gte': created_at},
+    ).order_by(*ascending_order)
+
+
+def fetch_keyset(queryset, decoded, limit, fields=('created_at', 'pk')):
+    """Até `limit` linhas a seguir ao cursor (ver keyset_queryset)."""
+    return list(keyset_queryset(queryset, decoded, fields)[:limit])
+
+
+def build_page(rows, decoded, page_size, key):
+    """
+    Constrói a CursorPage a partir de até page_size + 1 linhas devolvidas por
+    fetch_keyset. `key(linha)` devolve (created_at, pk) para os cursores.
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if is_backwards(decoded):
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, decoded is not None
+
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(NEXT, *key(rows[-1])) if rows and has_next else None,
+        previous_cursor=encode_cursor(PREVIOUS, *key(rows[0])) if rows and has_previous else None,
+    )
+
+
+def paginate_keyset(queryset, cursor, page_size):
+    """
+    Página de `queryset` ordenada por (-created_at, -pk) a partir de `cursor`
+    (None ou inválido = primeira página).
+    """
+    decoded = decode_cursor(cursor)
+    rows = fetch_keyset(queryset, decoded, page_size + 1)
+    return build_page(rows, decoded, page_size, key=lambda obj: (obj.created_at, obj.pk))
+
+
+class KeysetPaginationMixin:
+    """
+    Para ListViews: substitui o paginate_by (OFFSET + COUNT) por cursores.
+    O contexto recebe `page` (CursorPage) e a lista da página em object_list.
+    """
+    page_size = 10
+    cursor_param = 'cursor'
+
+    def paginate_keyset(self, queryset):
+        return paginate_keyset(queryset, self.request.GET.get(self.cursor_param), self.page_size)
+
+    def get_context_data(self, **kwargs):
+        page = self.paginate_keyset(self.object_list)
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context['page'] = page
+        return context
@@ -0,0 +1,125 @@
+# postsApp/signals.py
+# Mantém Post.like_count / Post.comment_count sincronizados com as tabelas
+# Like e Comment (UPDATE atómico com F(), sem COUNT). Se houver desvios,
+# `python manage.py reconcile_post_counters` corrige-os.
+# Também mantém a timeline materializada (ver postsApp/timeline.py) e a
+# contagem de referências dos ficheiros de media (ver postsApp/storage.py),
+# e cria as notificações (ver postsApp/notifications.py).
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import aggregator, notifications, timeline
+from .models import Comment, Follow, Like, Media, MediaBlob, Notification, Post
+from .storage import media_storage
+
+
+def _add(post_id, field, delta):
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)}, version=F('version') + 1)
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+    if created:
+        _add(instance.post_id, 'like_count', 1)
+        creator_id, user_id, post_id = instance.post.creator_id, instance.user_id, instance.post_id
+        transaction.on_commit(
+            lambda: aggregator.aggregator.add(creator_id, user_id, Notification.NotificationType.LIKE, post_id)
+        )
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+    _add(instance.post_id, 'like_count', -1)
+    user_id, post_id = instance.user_id, instance.post_id
+
+    def retract():
+        creator_id = Post.objects.filter(pk=post_id).values_list('creator_id', flat=True).first()
+        if creator_id is not None:  # post apagado: as notificações foram com ele
+            aggregator.aggregator.remove(creator_id, user_id, Notification.NotificationType.LIKE, post_id)
+
+    transaction.on_commit(retract)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        _add(instance.post_id, 'comment_count', 1)
+        recipients = {instance.post.creator_id}
+        if instance.parent_id:
+            recipients.add(instance.parent.user_id)  # resposta: avisa também o autor do comentário
+        user_id, post_id, comment_id = instance.user_id, instance.post_id, instance.pk
+
+        def add():
+            for recipient_id in recipients:
+                aggregator.aggregator.add(
+                    recipient_id, user_id, Notification.NotificationType.COMMENT, post_id, comment_id
+                )
+
+        transaction.on_commit(add)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    _add(instance.post_id, 'comment_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: timeline.fan_out_post(instance))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        get_user_model().objects.filter(pk=instance.followed_id) \
+            .update(follower_count=Greatest(F('follower_count') + 1, 0))
+        timeline.backfill_follow(instance.follower_id, instance.followed_id)
+        notifications.notify(instance.followed_id, instance.follower, Notification.NotificationType.FOLLOW)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    get_user_model().objects.filter(pk=instance.followed_id) \
+        .update(follower_count=Greatest(F('follower_count') - 1, 0))
+    timeline.remove_follow(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    notifications.notification_deleted(instance)
+
+
+@receiver(post_save, sender=Media)
+def media_created(sender, instance, created, **kwargs):
+    if created:
+        blob, _ = MediaBlob.objects.get_or_create(name=instance.file.name)
+        MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+@receiver(post_delete, sender=Media)
+def media_deleted(sender, instance, **kwargs):
+    # Também corre nos deletes em CASCADE de Post
+    name = instance.file.name
+    MediaBlob.objects.filter(name=name).update(ref_count=Greatest(F('ref_count') - 1, 0))
+    renditions = [f.name for f in (instance.thumbnail, instance.feed_image, instance.full_image) if f]
+
+    def cleanup():
+        release_blob(name)
+        for rendition in renditions:
+            instance.thumbnail.storage.delete(rendition)
+
+    # Os ficheiros só são apagados se a transação for confirmada
+    transaction.on_commit(cleanup)
+
+
+def release_blob(name):
+    """Apaga o ficheiro se já nenhuma Media o referencia."""
+    deleted, _ = MediaBlob.objects.filter(name=name, ref_count=0).delete()
+    if deleted:
+        media_storage.delete(name)
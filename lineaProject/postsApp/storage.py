@@ -0,0 +1,126 @@
+# postsApp/storage.py
+# Storage das media dos posts endereçado pelo conteúdo: cada ficheiro é
+# gravado como posts/media/<ab>/<sha256>.<ext>, por isso uploads iguais
+# partilham o mesmo ficheiro (e o mesmo URL, que pode ser cacheado para
+# sempre). As referências são contadas em MediaBlob (ver signals.py) e o
+# ficheiro só é apagado quando a última Media que o usa é apagada.
+# A extensão vem do tipo detetado pelos magic bytes (MIME_EXTENSIONS), nunca
+# do nome enviado pelo cliente: um GIF chamado x.html é gravado como .gif, e o
+# mesmo conteúdo com nomes diferentes fica num só ficheiro.
+
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+PREFIX = 'posts/media'
+TEMP_DIR = f'{PREFIX}/tmp'
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 16
+
+# assinatura -> (media_type, mime)
+SIGNATURES = [
+    (b'\xff\xd8\xff', ('image', 'image/jpeg')),
+    (b'\x89PNG\r\n\x1a\n', ('image', 'image/png')),
+    (b'GIF87a', ('image', 'image/gif')),
+    (b'GIF89a', ('image', 'image/gif')),
+    (b'\x1a\x45\xdf\xa3', ('video', 'video/webm')),
+]
+IMAGE_FTYP_BRANDS = {b'heic', b'heix', b'mif1', b'avif'}
+
+MIME_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/heic': '.heic',
+    'image/avif': '.avif',
+    'video/mp4': '.mp4',
+    'video/quicktime': '.mov',
+    'video/webm': '.webm',
+}
+EXTENSION_MIMES = {extension: mime for mime, extension in MIME_EXTENSIONS.items()}
+HASHED_NAME_RE = re.compile(
+    rf'^{PREFIX}/[0-9a-f]{{2}}/(?P<sha256>[0-9a-f]{{64}})'
+    rf'(?P<extension>{"|".join(re.escape(e) for e in EXTENSION_MIMES)})?$'
+)
+
+
+def sniff_media_type(head):
+    """Devolve (media_type, mime) a partir dos primeiros bytes, ou None."""
+    for signature, result in SIGNATURES:
+        if head.startswith(signature):
+            return result
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image', 'image/webp'
+    if head[4:8] == b'ftyp':  # ISO BMFF: mp4, mov, heic, avif...
+        brand = head[8:12]
+        if brand in IMAGE_FTYP_BRANDS:
+            return 'image', 'image/heic' if brand != b'avif' else 'image/avif'
+        return 'video', 'video/quicktime' if brand == b'qt  ' else 'video/mp4'
+    return None
+
+
+def sniff_mime(content):
+    """MIME detetado de um ficheiro aberto (None se não for suportado)."""
+    content.seek(0)
+    sniffed = sniff_media_type(content.read(SNIFF_BYTES))
+    content.seek(0)
+    return sniffed[1] if sniffed else None
+
+
+def sha256_of(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(sha256, mime):
+    return f"{PREFIX}/{sha256[:2]}/{sha256}{MIME_EXTENSIONS.get(mime, '')}"
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.match(name or ''))
+
+
+def hashed_name_mime(name):
+    """MIME de um nome endereçado (pela extensão, que vem do conteúdo), ou None."""
+    match = HASHED_NAME_RE.match(name or '')
+    return EXTENSION_MIMES.get(match['extension']) if match and match['extension'] else None
+
+
+@deconstructible(path='postsApp.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+
+    def temp_name(self):
+        return f"{TEMP_DIR}/{uuid.uuid4().hex}.part"
+
+    def promote(self, temp_name, sha256, mime):
+        """
+        Move um ficheiro temporário (já completo) para o nome final. Se o
+        conteúdo já existir, o temporário é descartado.
+        """
+        name = hashed_name(sha256, mime)
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(self.path(temp_name))
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.path(temp_name), path)  # atómico (mesmo filesystem)
+        return name
+
+    def _save(self, name, content):
+        sha256 = getattr(content, 'sha256', None) or sha256_of(content)
+        mime = sniff_mime(content)
+        if self.exists(hashed_name(sha256, mime)):
+            return hashed_name(sha256, mime)
+        temp = super()._save(self.temp_name(), content)
+        return self.promote(temp, sha256, mime)
+
+
+media_storage = ContentAddressedStorage()
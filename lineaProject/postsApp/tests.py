@@ -1,3 +1,861 @@
-from django.test import TestCase
+import base64
+import io
+import os
+import re
+import struct
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import skipUnless
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from lineaProject.db_routers import PrimaryReplicaRouter, replica_reads
+from lineaProject.instrumentation import QueryBudgetTestMixin
+from lineaProject.test_runner import TEST_REPLICA_ALIAS
+
+from . import likes, notifications
+from .aggregator import aggregator
+from .comments import comment_threads
+from .media_processing import RENDITIONS, process_media, strip_video_metadata
+from .pagination import NEXT, keyset_queryset
+from .models import Comment, Follow, Like, Media, MediaBlob, Notification, Post, TimelineEntry
+from .routing import websocket_urlpatterns
+from .storage import is_hashed_name, media_storage
+from .timeline import timeline_page
 
 # Create your tests here.
+
+
+# Notificações escritas logo (sem buffer entre testes)
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class LikeConcurrencyTests(TransactionTestCase):
+    """like/unlike chamados em paralelo (ex.: duplo clique) mantêm o contador certo."""
+
+    threads = 8
+    rounds = 10
+
+    def setUp(self):
+        # SQLite em memória: uma só ligação (ver DATABASES['default']['TEST'])
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Base de dados de teste em memória.")
+        User = get_user_model()
+        self.creator = User.objects.create(username='creator', email='creator@example.com')
+        self.users = [
+            User.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(self.threads)
+        ]
+        self.post = Post.objects.create(creator=self.creator, content_type=Post.ContentType.TEXT)
+
+    def hammer(self, target):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def run(i):
+            try:
+                barrier.wait()
+                target(i)
+            except Exception as e:  # noqa: BLE001 - reportado no assert
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=run, args=(i,)) for i in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+
+    def assertCountMatches(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, Like.objects.filter(post=self.post).count())
+
+    def test_same_user_double_click(self):
+        user_id = self.users[0].pk
+        changed = []
+        self.hammer(lambda i: changed.append(likes.like(user_id, self.post.pk)[0]))
+
+        self.assertEqual(changed.count(True), 1)
+        self.assertCountMatches()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_like_unlike_many_users(self):
+        def toggle(i):
+            user_id = self.users[i].pk
+            for _ in range(self.rounds):
+                likes.like(user_id, self.post.pk)
+                likes.like(user_id, self.post.pk)
+                likes.unlike(user_id, self.post.pk)
+                likes.unlike(user_id, self.post.pk)
+            if i % 2 == 0:  # metade termina com like
+                likes.like(user_id, self.post.pk)
+
+        self.hammer(toggle)
+        self.assertCountMatches()
+        self.assertEqual(self.post.like_count, self.threads // 2)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class LikeTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.creator = User.objects.create(username='creator', email='creator@example.com')
+        self.user = User.objects.create(username='user', email='user@example.com')
+        self.post = Post.objects.create(creator=self.creator, content_type=Post.ContentType.TEXT)
+        self.client.force_login(self.user)
+
+    def test_put_and_delete_are_idempotent(self):
+        url = f'/postsApp/{self.post.pk}/like/'
+        for _ in range(2):
+            self.assertEqual(self.client.put(url).json(), {'liked': True, 'likes_count': 1})
+        for _ in range(2):
+            self.assertEqual(self.client.delete(url).json(), {'liked': False, 'likes_count': 0})
+
+    def test_missing_post(self):
+        self.assertEqual(self.client.put('/postsApp/999999/like/').status_code, 404)
+        self.assertFalse(Like.objects.exists())
+
+    def test_missing_post_in_transaction(self):
+        # O like num post inexistente é desfeito já, não no COMMIT da transação de fora
+        with transaction.atomic():
+            with self.assertRaises(likes.PostNotFound):
+                likes.like(self.user.pk, 999999)
+            self.assertFalse(Like.objects.exists())
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class CommentTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='user', email='user@example.com')
+        self.post = Post.objects.create(creator=self.user, content_type=Post.ContentType.TEXT)
+        self.client.force_login(self.user)
+
+    def test_invalid_parent(self):
+        url = f'/postsApp/{self.post.pk}/comment/'
+        self.assertEqual(self.client.post(url, {'text': 'olá', 'parent': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'text': 'olá', 'parent': '999999'}).status_code, 404)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_threads_oldest_first(self):
+        comments = [Comment.objects.create(post=self.post, user=self.user, text=str(i)) for i in range(5)]
+        first = comment_threads(self.post, page_size=2)
+        self.assertEqual(list(first), comments[:2])
+        second = comment_threads(self.post, first.next_cursor, page_size=2)
+        self.assertEqual(list(second), comments[2:4])
+        self.assertEqual(list(comment_threads(self.post, second.previous_cursor, page_size=2)), comments[:2])
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class PostCounterTests(TestCase):
+    """Post.like_count / comment_count e o comando reconcile_post_counters."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.creator = User.objects.create(username='creator', email='creator@example.com')
+        self.user = User.objects.create(username='user', email='user@example.com')
+        self.post = Post.objects.create(creator=self.creator, content_type=Post.ContentType.TEXT)
+
+    def counters(self):
+        self.post.refresh_from_db()
+        return self.post.like_count, self.post.comment_count
+
+    def test_counters_follow_writes(self):
+        likes.like(self.user.pk, self.post.pk)
+        Like.objects.create(user=self.creator, post=self.post)  # pelo ORM (sinais)
+        self.assertEqual(self.counters(), (2, 0))
+        likes.unlike(self.user.pk, self.post.pk)
+        self.assertEqual(self.counters(), (1, 0))
+
+        self.client.force_login(self.user)
+        self.client.post(f'/postsApp/{self.post.pk}/comment/', {'text': 'olá'})
+        comment = Comment.objects.create(post=self.post, user=self.creator, text='obrigado')
+        self.assertEqual(self.counters(), (1, 2))
+        comment.delete()
+        self.assertEqual(self.counters(), (1, 1))
+
+    def test_reconcile(self):
+        Like.objects.create(user=self.user, post=self.post)
+        Comment.objects.create(post=self.post, user=self.user, text='olá')
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=0)
+
+        call_command('reconcile_post_counters', '--dry-run', stdout=io.StringIO())
+        self.assertEqual(self.counters(), (7, 0))
+        version = self.post.version
+        out = io.StringIO()
+        call_command('reconcile_post_counters', stdout=out)
+        self.assertIn('1 posts com desvio', out.getvalue())
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.post.version, version + 1)  # cartão em cache invalidado
+
+
+def raw_cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursores (created_at, id) com datas repetidas e cursores inválidos."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='user', email='user@example.com')
+        Post.objects.bulk_create([Post(creator=self.user, content_type=Post.ContentType.TEXT) for _ in range(25)])
+        # Três grupos de posts com o mesmo created_at, que atravessam as páginas (10 por página)
+        times = [timezone.now() - timedelta(minutes=i // 9) for i in range(25)]
+        for post, created_at in zip(Post.objects.order_by('pk'), times):
+            Post.objects.filter(pk=post.pk).update(created_at=created_at)
+        self.expected = list(Post.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.client.force_login(self.user)
+
+    def page(self, cursor=None):
+        response = self.client.get('/postsApp/user/user/', {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page']
+        return [post.pk for post in page], page
+
+    def test_forward_and_back(self):
+        pages, cursors, cursor = [], [], None
+        while True:
+            ids, page = self.page(cursor)
+            pages.append(ids)
+            cursors.append(page.previous_cursor)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual([len(ids) for ids in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), self.expected)  # sem repetidos nem falhas
+        self.assertIsNone(cursors[0])
+
+        # Para trás a partir da última página
+        for i in range(len(pages) - 1, 0, -1):
+            ids, page = self.page(cursors[i])
+            self.assertEqual(ids, pages[i - 1])
+            self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+    def test_invalid_cursor(self):
+        first, _ = self.page()
+        now = timezone.now().isoformat()
+        for cursor in (
+            'lixo', '%%%', raw_cursor('n|ontem|1'), raw_cursor(f'x|{now}|1'), raw_cursor(f'n|{now}'),
+            raw_cursor(f'n|{now}|{10 ** 30}'), raw_cursor(f'n|{now}|-{10 ** 30}'), raw_cursor('n|2026-10-18T10:00:00|1'),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.page(cursor)[0], first)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class LikeNotificationTests(TestCase):
+    """Sequências de like / unlike / lida nas notificações agrupadas."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.creator = User.objects.create(username='creator', email='creator@example.com')
+        self.ana = User.objects.create(username='ana', email='ana@example.com')
+        self.rui = User.objects.create(username='rui', email='rui@example.com')
+        self.post = Post.objects.create(creator=self.creator, content_type=Post.ContentType.TEXT)
+
+    def like(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            likes.like(user.pk, self.post.pk)
+
+    def unlike(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            likes.unlike(user.pk, self.post.pk)
+
+    def groups(self):
+        return list(Notification.objects.order_by('pk').values_list('sender__username', 'actor_count', 'is_read'))
+
+    def test_unlike_leaves_group(self):
+        self.like(self.ana)
+        self.like(self.rui)
+        self.assertEqual(self.groups(), [('rui', 2, False)])
+        self.unlike(self.rui)
+        self.assertEqual(self.groups(), [('ana', 1, False)])
+        self.unlike(self.ana)
+        self.assertEqual(self.groups(), [])
+        self.assertEqual(notifications.unread_count(self.creator.pk), 0)
+
+    def test_unlike_after_read(self):
+        self.like(self.ana)
+        notifications.mark_read(self.creator.pk)
+        self.like(self.rui)  # grupo novo
+        self.unlike(self.ana)  # estava no grupo já lido
+        self.assertEqual(self.groups(), [('ana', 1, True), ('rui', 1, False)])
+        self.assertEqual(notifications.unread_count(self.creator.pk), 1)
+
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=60)
+    def test_unlike_within_window(self):
+        self.like(self.ana)
+        self.like(self.rui)
+        self.unlike(self.ana)
+        aggregator.flush()
+        self.assertEqual(self.groups(), [('rui', 1, False)])
+        self.unlike(self.rui)  # já escrito: sai do grupo
+        self.like(self.ana)
+        self.unlike(self.ana)
+        self.assertEqual(aggregator.flush(), 0)
+        self.assertEqual(self.groups(), [])
+
+    def test_same_commenter_in_two_flushes(self):
+        for text in ('primeiro', 'segundo'):
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(post=self.post, user=self.ana, text=text)
+        self.assertEqual(self.groups(), [('ana', 1, False)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, user=self.rui, text='terceiro')
+        self.assertEqual(self.groups(), [('rui', 2, False)])
+        self.assertEqual(notifications.unread_count(self.creator.pk), 1)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """O nº de queries das páginas não cresce com o nº de posts / comentários (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.viewer = User.objects.create(username='viewer', email='viewer@example.com')
+        cls.creator = User.objects.create(username='creator', email='creator@example.com')
+        Follow.objects.create(follower=cls.viewer, followed=cls.creator)
+        # A timeline é preenchida depois do commit (fan-out)
+        with cls.captureOnCommitCallbacks(execute=True):
+            for i in range(12):
+                post = Post.objects.create(
+                    creator=cls.creator, content_type=Post.ContentType.IMAGE, description=f'post {i}'
+                )
+                Media.objects.create(post=post, file=f'posts/media/{i}.jpg', media_type=Media.MediaType.IMAGE)
+                Like.objects.create(user=cls.viewer, post=post)
+                comment = Comment.objects.create(post=post, user=cls.viewer, text='comentário')
+                Comment.objects.create(post=post, user=cls.creator, text='resposta', parent=comment)
+        cls.post = post
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+
+    def test_feed(self):
+        response = self.client.get('/postsApp/')
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertWithinQueryBudget(response)
+
+    def test_user_posts(self):
+        self.assertWithinQueryBudget(self.client.get(f'/postsApp/user/{self.creator.username}/'))
+
+    def test_detail(self):
+        self.assertWithinQueryBudget(self.client.get(f'/postsApp/{self.post.pk}/'))
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def test_routing(self):
+        db_router = PrimaryReplicaRouter()
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            self.assertEqual(db_router.db_for_read(Post), 'default')  # fora de um pedido
+            with replica_reads():
+                self.assertEqual(db_router.db_for_read(Post), 'replica')
+                self.assertEqual(db_router.db_for_read(get_user_model()), 'default')
+                self.assertEqual(db_router.db_for_write(Post), 'default')
+            self.assertTrue(db_router.allow_migrate('default', 'postsApp'))
+            self.assertFalse(db_router.allow_migrate('replica', 'postsApp'))
+        with override_settings(DATABASE_REPLICAS=[]), replica_reads():
+            self.assertEqual(db_router.db_for_read(Post), 'default')
+
+
+# Duas bases SQLite reais (a segunda vem do lineaProject/test_runner.py): a
+# réplica é uma cópia da primária (backup do SQLite) feita em sync_replica(),
+# por isso o que a primária escreve depois não está na réplica (atraso da
+# replicação)
+@skipUnless(TEST_REPLICA_ALIAS in settings.DATABASES, "Só com a base de dados de teste SQLite num ficheiro.")
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0, DATABASE_REPLICAS=[TEST_REPLICA_ALIAS])
+class ReplicaTests(TransactionTestCase):
+    databases = {'default', TEST_REPLICA_ALIAS}
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='user', email='user@example.com')
+        self.post = Post.objects.create(creator=self.user, content_type=Post.ContentType.TEXT)
+        self.sync_replica()
+        self.client.force_login(self.user)
+
+    def sync_replica(self):
+        primary, replica = connections['default'], connections[TEST_REPLICA_ALIAS]
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    def replica_queries(self, url):
+        with CaptureQueriesContext(connections[TEST_REPLICA_ALIAS]) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_replica_lag(self):
+        new_post = Post.objects.create(creator=self.user, content_type=Post.ContentType.TEXT)
+        with replica_reads():
+            self.assertEqual(Post.objects.all().db, TEST_REPLICA_ALIAS)
+            self.assertEqual(list(Post.objects.all()), [self.post])  # ainda sem o post novo
+            with transaction.atomic():
+                self.assertEqual(Post.objects.all().db, 'default')
+                self.assertIn(new_post, Post.objects.all())
+
+    def test_read_your_writes(self):
+        url = f'/postsApp/{self.post.pk}/'
+        self.assertGreater(self.replica_queries(url), 0)
+        response = self.client.post(f'/postsApp/{self.post.pk}/comment/', {'text': 'olá'})
+        self.assertIn(settings.DATABASE_PIN_COOKIE, response.cookies)
+        # O redirect para o post lê da primária (a réplica não tem o comentário)
+        with CaptureQueriesContext(connections[TEST_REPLICA_ALIAS]) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 0)
+        self.assertContains(response, 'olá')
+
+
+GIF = b'GIF89a' + bytes(32)
+
+
+@override_settings(POST_MEDIA_PROCESS_IN_BACKGROUND=False)
+class MediaTestCase(TestCase):
+    """MEDIA_ROOT temporário e upload pela view de criação de posts."""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create(username='user', email='user@example.com')
+
+    def stored_files(self):
+        return [f for _, _, files in os.walk(self.media_root.name) for f in files]
+
+    def post(self, client, content=GIF, **data):
+        client.force_login(self.user)
+        upload = SimpleUploadedFile('x.gif', content)
+        return client.post('/postsApp/create/', {'content_type': 'image', 'media_files': upload, **data})
+
+
+class PostCreateUploadTests(MediaTestCase):
+    """Os ficheiros gravados durante o upload são apagados se o post não for criado."""
+
+    def test_csrf_failure(self):
+        # Com cookie, o token só é comparado depois de o corpo ser lido
+        client = Client(enforce_csrf_checks=True)
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        response = self.post(client, csrfmiddlewaretoken='b' * 32)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_invalid_form(self):
+        response = self.post(self.client, content_type='nope')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(Media.objects.exists())
+
+    def assertRejected(self, response, error):
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(error, response.context['form'].non_field_errors())
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(MediaBlob.objects.exists())
+
+    @override_settings(POST_MEDIA_MAX_FILE_SIZE=100)
+    def test_file_too_large(self):
+        response = self.post(self.client, content=GIF + bytes(100))
+        self.assertRejected(response, "x.gif: o ficheiro excede o tamanho máximo.")
+
+    @override_settings(POST_MEDIA_MAX_POST_SIZE=100)
+    def test_post_too_large(self):
+        response = self.post(self.client, content=GIF + bytes(2 * 1024 * 1024))
+        self.assertRejected(response, "O upload excede o tamanho máximo permitido por post.")
+
+    def test_wrong_magic_bytes(self):
+        # O nome e o content_type dizem GIF, o conteúdo não é uma imagem
+        response = self.post(self.client, content=b'MZ\x90\x00' + bytes(64))
+        self.assertRejected(response, "x.gif: tipo de ficheiro não suportado.")
+
+
+class MediaBlobTests(MediaTestCase):
+    """Uploads iguais partilham o ficheiro (MediaBlob.ref_count)."""
+
+    def test_shared_blob(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.post(self.client).status_code, 302)
+        first, second = Post.objects.order_by('pk')
+        name = first.media.get().file.name
+        self.assertEqual(second.media.get().file.name, name)
+        self.assertEqual(list(MediaBlob.objects.values_list('name', 'ref_count')), [(name, 2)])
+        self.assertEqual(len(self.stored_files()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()  # Media apagada em cascata
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        self.assertTrue(media_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(media_storage.exists(name))
+        self.assertEqual(self.stored_files(), [])
+
+
+def jpeg_with_exif(size, orientation=1):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = 'Câmara de teste'  # Make
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 50, 50)).save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class ImageRenditionTests(MediaTestCase):
+    """Versões das imagens: tamanhos de RENDITIONS, orientação aplicada, sem EXIF."""
+
+    def check_renditions(self, fmt, extension):
+        with override_settings(POST_MEDIA_RENDITION_FORMAT=fmt):
+            # 2000x1000 rodada 90° pelo EXIF (orientation=6) -> 1000x2000
+            self.post(self.client, content=jpeg_with_exif((2000, 1000), orientation=6))
+            media = Media.objects.latest('pk')
+            self.assertEqual(process_media(media.pk), Media.Status.READY)
+        media.refresh_from_db()
+        self.assertEqual((media.width, media.height), (1000, 2000))
+        for field, max_side in RENDITIONS.items():
+            rendition = getattr(media, field)
+            self.assertTrue(rendition.name.endswith(f'.{extension}'), rendition.name)
+            with rendition.open('rb') as f, Image.open(f) as image:
+                self.assertEqual(image.size, (max_side // 2, max_side))
+                self.assertEqual(dict(image.getexif()), {})
+                self.assertNotIn('exif', image.info)
+
+    def test_webp(self):
+        self.check_renditions('WEBP', 'webp')
+
+    def test_jpeg(self):
+        self.check_renditions('JPEG', 'jpg')
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    """A extensão vem dos magic bytes, não do nome enviado."""
+
+    def test_extension_from_content(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            gif = b'GIF89a<script>alert(1)</script>'
+            name = media_storage.save('x.html', ContentFile(gif))
+            self.assertTrue(name.endswith('.gif'))
+            self.assertTrue(is_hashed_name(name))
+            self.assertEqual(media_storage.save('y.gif', ContentFile(gif)), name)
+            self.assertFalse(media_storage.save('z.gif', ContentFile(b'<html>')).endswith('.gif'))
+            self.assertFalse(is_hashed_name(name[:-len('.gif')] + '.html'))
+
+
+class ServeMediaTests(SimpleTestCase):
+    """Só os vídeos e as versões geradas são servidos, com um Content-Type fixo."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=media_root.name, MEDIA_ACCEL_REDIRECT_PREFIX='')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.video = media_storage.save('v.mp4', ContentFile(b'\x00\x00\x00\x18ftypisom' + bytes(100)))
+        self.image = media_storage.save('i.jpg', ContentFile(b'\xff\xd8\xff' + bytes(100)))
+        self.rendition = default_storage.save('posts/renditions/1_feed_image.webp', ContentFile(b'RIFF'))
+        self.html = default_storage.save('posts/renditions/x.html', ContentFile(b'<script>'))
+        self.temp = default_storage.save('posts/media/tmp/abc.part', ContentFile(b'GIF89a'))
+
+    def test_allowed(self):
+        for name, content_type in ((self.video, 'video/mp4'), (self.rendition, 'image/webp')):
+            response = self.client.get(f'/media/{name}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], content_type)
+            self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_refused(self):
+        for name in (self.image, self.html, self.temp):
+            self.assertEqual(self.client.get(f'/media/{name}').status_code, 404, name)
+
+    def test_if_range(self):
+        url = f'/media/{self.video}'
+        validators = self.client.get(url)
+        for if_range, status in (
+            (validators['ETag'], 206),
+            (validators['Last-Modified'], 206),
+            ('"outro"', 200),
+            ('Sat, 01 Jan 2000 00:00:00 GMT', 200),
+        ):
+            response = self.client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': if_range})
+            self.assertEqual(response.status_code, status, if_range)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationConsumerTests(TransactionTestCase):
+    """WebSocket das notificações (ws/notifications/) com o channel layer em memória."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username='user', email='user@example.com')
+        self.sender = User.objects.create(username='sender', email='sender@example.com')
+        self.post = Post.objects.create(creator=self.user, content_type=Post.ContentType.TEXT)
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/notifications/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        return connected, communicator
+
+    async def test_anonymous_is_rejected(self):
+        connected, _ = await self.connect(AnonymousUser())
+        self.assertFalse(connected)
+
+    async def test_notify_and_mark_read(self):
+        first = await database_sync_to_async(notifications.notify)(
+            self.user.pk, self.sender, Notification.NotificationType.FOLLOW,
+        )
+        connected, communicator = await self.connect(self.user)
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {'event': 'unread', 'unread': 1})
+
+        second = await database_sync_to_async(notifications.notify)(
+            self.user.pk, self.sender, Notification.NotificationType.LIKE, post=self.post,
+        )
+        message = await communicator.receive_json_from()
+        self.assertEqual((message['event'], message['unread']), ('notification', 2))
+        self.assertEqual(message['notification']['id'], second.pk)
+
+        await communicator.send_json_to({'action': 'mark_read', 'ids': [first.pk]})
+        self.assertEqual(
+            await communicator.receive_json_from(), {'event': 'read', 'ids': [first.pk], 'unread': 1},
+        )
+        await communicator.send_json_to({'action': 'mark_read'})
+        self.assertEqual(await communicator.receive_json_from(), {'event': 'read', 'ids': None, 'unread': 0})
+        await communicator.disconnect()
+
+    async def test_invalid_frames(self):
+        notification = await database_sync_to_async(notifications.notify)(
+            self.user.pk, self.sender, Notification.NotificationType.FOLLOW,
+        )
+        connected, communicator = await self.connect(self.user)
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # nº de não lidas
+
+        frames = [
+            {'action': 'mark_read', 'ids': 5}, {'action': 'mark_read', 'ids': '12'},
+            {'action': 'mark_read', 'ids': ['x']}, {'action': 'mark_read', 'ids': [True, 1.5, None]},
+            {'action': 'mark_read', 'ids': {'1': 1}}, {'action': 'outra'}, [1, 2],
+        ]
+        for frame in frames:
+            await communicator.send_json_to(frame)
+            self.assertEqual((await communicator.receive_json_from())['event'], 'error')
+        await communicator.send_to(text_data='{não é json')
+        self.assertEqual((await communicator.receive_json_from())['event'], 'error')
+
+        # A ligação continua aberta e nada foi marcado como lido
+        await communicator.send_json_to({'action': 'mark_read', 'ids': [notification.pk]})
+        self.assertEqual(
+            await communicator.receive_json_from(), {'event': 'read', 'ids': [notification.pk], 'unread': 0},
+        )
+        await communicator.disconnect()
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class PostCardCacheTests(TestCase):
+    """Cartões do feed em cache (fragmentos por versão do post) com a cache local e em ficheiros."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.creator = User.objects.create(username='creator', email='creator@example.com')
+        self.viewer = User.objects.create(username='viewer', email='viewer@example.com')
+        Follow.objects.create(follower=self.viewer, followed=self.creator)
+        with self.captureOnCommitCallbacks(execute=True):  # fan-out para as timelines
+            self.post = Post.objects.create(creator=self.creator, content_type=Post.ContentType.TEXT, description='primeira')
+
+    def feed(self, user):
+        self.client.force_login(user)
+        return self.client.get('/postsApp/').content.decode()
+
+    def check_backend(self):
+        self.assertIn('primeira', self.feed(self.viewer))
+        self.assertIn('Dar Like', self.feed(self.creator))
+
+        likes.like(self.viewer.pk, self.post.pk)
+        viewer_feed = self.feed(self.viewer)
+        self.assertIn('❤️ 1 likes', viewer_feed)
+        self.assertIn('Remover Like', viewer_feed)
+        creator_feed = self.feed(self.creator)  # mesmo fragmento, botão do próprio
+        self.assertIn('❤️ 1 likes', creator_feed)
+        self.assertIn('Dar Like', creator_feed)
+
+        self.post.description = 'editada'
+        self.post.save()
+        self.assertIn('editada', self.feed(self.viewer))
+
+        self.creator.username = 'renamed'
+        self.creator.save()
+        self.assertIn('renamed', self.feed(self.viewer))
+
+    def test_locmem(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.check_backend()
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            self.check_backend()
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0, TIMELINE_FANOUT_MAX_FOLLOWERS=2)
+class TimelineTests(TestCase):
+    """Fan-out híbrido da timeline (postsApp/timeline.py): star tem 2 seguidores, é celebridade."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.ana, self.rui, self.star, self.bia = [
+            User.objects.create(username=name, email=f'{name}@example.com') for name in ('ana', 'rui', 'star', 'bia')
+        ]
+        Follow.objects.create(follower=self.ana, followed=self.rui)
+        Follow.objects.create(follower=self.ana, followed=self.star)
+        Follow.objects.create(follower=self.bia, followed=self.star)
+
+    def post(self, creator):
+        with self.captureOnCommitCallbacks(execute=True):  # fan-out
+            return Post.objects.create(creator=creator, content_type=Post.ContentType.TEXT)
+
+    def timeline(self, user, page_size=10):
+        user.refresh_from_db()
+        pages, cursor = [], None
+        while True:
+            page = timeline_page(user, cursor, page_size)
+            pages.append(list(page))
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_follower_sees_new_post(self):
+        post = self.post(self.rui)
+        self.assertEqual(self.timeline(self.ana), [[post]])
+        self.assertEqual(self.timeline(self.rui), [[post]])
+        self.assertEqual(self.timeline(self.bia), [[]])
+
+    def test_celebrity_merged_on_read(self):
+        posts = [self.post(creator) for creator in (self.rui, self.star, self.rui, self.star, self.ana)]
+        self.assertFalse(TimelineEntry.objects.filter(post__creator=self.star).exclude(user=self.star).exists())
+        newest_first = posts[::-1]
+        self.assertEqual(self.timeline(self.ana, page_size=2), [newest_first[0:2], newest_first[2:4], newest_first[4:]])
+        self.assertEqual(self.timeline(self.bia), [[posts[3], posts[1]]])
+
+    def test_unfollow_removes_entries(self):
+        post = self.post(self.rui)
+        Follow.objects.filter(follower=self.ana, followed=self.rui).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.ana, post=post).exists())
+        self.assertEqual(self.timeline(self.ana), [[]])
+
+    def test_backfill_command(self):
+        posts = [self.post(creator) for creator in (self.ana, self.rui, self.star)]
+        TimelineEntry.objects.all().delete()
+        call_command('timeline_backfill', stdout=io.StringIO())
+        self.assertEqual(self.timeline(self.ana), [posts[::-1]])
+        self.assertEqual(self.timeline(self.rui), [[posts[1]]])
+
+
+# Sinais de que o plano não usa um índice: percorre a tabela toda ou ordena à parte
+PLAN_RED_FLAGS = {
+    'sqlite': [re.compile(r'\bSCAN\b'), re.compile(r'TEMP B-TREE')],
+    'postgresql': [re.compile(r'Seq Scan'), re.compile(r'^\s*(->\s*)?Sort\b', re.M)],
+}
+
+
+@skipUnless(connection.vendor in PLAN_RED_FLAGS, "EXPLAIN só é verificado em SQLite e PostgreSQL.")
+@override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+class IndexPlanTests(TestCase):
+    """As queries mais frequentes usam os índices dos modelos (ver migração 0011)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(20)]
+        )
+        cls.user = users[0]
+        posts = Post.objects.bulk_create(
+            [Post(creator=users[i % 20], content_type=Post.ContentType.TEXT) for i in range(400)]
+        )
+        cls.post = posts[0]
+        Comment.objects.bulk_create(
+            [Comment(post=posts[i % 400], user=users[i % 20], text='comentário') for i in range(2000)]
+        )
+        Follow.objects.bulk_create(
+            [Follow(follower=a, followed=b) for a in users for b in users if a != b]
+        )
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=users[i % 20], sender=users[(i + 1) % 20],
+                notification_type=Notification.NotificationType.FOLLOW, is_read=i % 10 != 0,
+            )
+            for i in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Com poucas linhas o PostgreSQL prefere ler a tabela toda
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        for flag in PLAN_RED_FLAGS[connection.vendor]:
+            self.assertIsNone(flag.search(plan), f"{flag.pattern} em:\n{plan}\n{queryset.query}")
+
+    def test_user_posts(self):
+        cursor = (NEXT, self.post.created_at, self.post.pk)
+        for decoded in (None, cursor):
+            self.assertUsesIndex(keyset_queryset(Post.objects.filter(creator=self.user), decoded))
+
+    def test_post_comments(self):
+        self.assertUsesIndex(Comment.objects.filter(post=self.post))
+        # Comentários de topo (threads, ver postsApp/comments.py)
+        self.assertUsesIndex(keyset_queryset(Comment.objects.filter(post=self.post, parent__isnull=True), None, ascending=True))
+
+    def test_notifications(self):
+        self.assertUsesIndex(Notification.objects.filter(recipient=self.user))
+        self.assertUsesIndex(Notification.objects.filter(recipient=self.user, is_read=False))
+
+    def test_followers(self):
+        self.assertUsesIndex(Follow.objects.filter(followed=self.user).values_list('follower_id', flat=True))
+        self.assertUsesIndex(Follow.objects.filter(follower=self.user, followed=self.post.creator_id))
+
+
+def box(kind, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+class VideoMetadataTests(SimpleTestCase):
+    """Os metadados (udta/meta) dos MP4 são apagados sem mudar a estrutura."""
+
+    def test_strip(self):
+        gps = box(b'\xa9xyz', b'+38.7223-009.1393/')
+        video = box(b'ftyp', b'isom') + box(b'moov', box(b'mvhd', bytes(4)) + box(b'trak', box(b'udta', gps)) + box(b'udta', gps))
+        with tempfile.NamedTemporaryFile(suffix='.mp4') as f:
+            f.write(video)
+            f.flush()
+            self.assertTrue(strip_video_metadata(f.name))
+            f.seek(0)
+            stripped = f.read()
+            self.assertEqual(len(stripped), len(video))
+            self.assertNotIn(b'38.7223', stripped)
+            self.assertNotIn(b'udta', stripped)
+            self.assertIn(b'mvhd', stripped)
+            # Segunda passagem: nada a apagar
+            self.assertFalse(strip_video_metadata(f.name))
@@ -0,0 +1,118 @@
+# postsApp/timeline.py
+# Timeline personalizada (posts de quem o utilizador segue + os seus).
+#
+# Fan-out híbrido:
+# - contas normais: ao criar um post é gravada uma TimelineEntry por seguidor
+#   (fan-out on write), por isso ler a timeline é um range scan no índice
+#   (user, -created_at, -post);
+# - contas com TIMELINE_FANOUT_MAX_FOLLOWERS ou mais seguidores: os posts não
+#   são copiados e são juntos à timeline na leitura (fan-out on read).
+
+import heapq
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import Follow, Post, TimelineEntry
+from .pagination import build_page, decode_cursor, fetch_keyset, is_backwards
+
+BATCH_SIZE = 1000
+
+
+def fanout_max_followers():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def is_celebrity(user):
+    return user.follower_count >= fanout_max_followers()
+
+
+def _is_celebrity_id(user_id):
+    # Lê o contador da base de dados (a instância em memória pode estar desatualizada)
+    User = get_user_model()
+    return User.objects.filter(pk=user_id, follower_count__gte=fanout_max_followers()).exists()
+
+
+def _entries(user_ids, post):
+    return [TimelineEntry(user_id=user_id, post=post, created_at=post.created_at) for user_id in user_ids]
+
+
+# --- Escrita ---
+def fan_out_post(post):
+    """Coloca o post na timeline do autor e (se não for celebridade) dos seguidores."""
+    TimelineEntry.objects.bulk_create(_entries([post.creator_id], post), ignore_conflicts=True)
+    if _is_celebrity_id(post.creator_id):
+        return
+
+    followers = Follow.objects.filter(followed_id=post.creator_id).values_list('follower_id', flat=True)
+    batch = []
+    for follower_id in followers.iterator(chunk_size=BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) == BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(_entries(batch, post), ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(_entries(batch, post), ignore_conflicts=True)
+
+
+def backfill_follow(follower_id, followed_id, limit=None):
+    """Copia os posts recentes de `followed_id` para a timeline de `follower_id`."""
+    if _is_celebrity_id(followed_id):
+        return 0
+    limit = limit or getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+    posts = Post.objects.filter(creator_id=followed_id).order_by('-created_at', '-id') \
+        .values_list('id', 'created_at')[:limit]
+    entries = [
+        TimelineEntry(user_id=follower_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in posts
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+def remove_follow(follower_id, followed_id):
+    """Remove da timeline do seguidor os posts de quem deixou de seguir."""
+    TimelineEntry.objects.filter(user_id=follower_id, post__creator_id=followed_id).delete()
+
+
+# --- Leitura ---
+def timeline_page(user, cursor, page_size, posts=None):
+    """
+    Página (CursorPage de Post) da timeline de `user`: junta o range scan da
+    timeline materializada com os posts das celebridades seguidas.
+    `posts` é o queryset base usado para carregar os posts da página.
+    """
+    posts = posts if posts is not None else Post.objects.all()
+    decoded = decode_cursor(cursor)
+    limit = page_size + 1
+
+    sources = [fetch_keyset(
+        TimelineEntry.objects.filter(user=user).values_list('created_at', 'post_id'),
+        decoded, limit, fields=('created_at', 'post_id'),
+    )]
+
+    User = get_user_model()
+    celebrities = list(
+        User.objects.filter(followers__follower=user, follower_count__gte=fanout_max_followers())
+        .values_list('id', flat=True)
+    )
+    if is_celebrity(user):
+        celebrities.append(user.id)
+    if celebrities:
+        sources.append(fetch_keyset(
+            Post.objects.filter(creator_id__in=celebrities).values_list('created_at', 'id'),
+            decoded, limit,
+        ))
+
+    # Cada fonte já vem ordenada; junta e remove repetidos
+    keys, seen = [], set()
+    for created_at, post_id in heapq.merge(*sources, reverse=not is_backwards(decoded)):
+        if post_id not in seen:
+            seen.add(post_id)
+            keys.append((created_at, post_id))
+            if len(keys) == limit:
+                break
+
+    loaded = posts.in_bulk([post_id for _, post_id in keys])
+    rows = [loaded[post_id] for _, post_id in keys if post_id in loaded]
+    return build_page(rows, decoded, page_size, key=lambda post: (post.created_at, post.pk))
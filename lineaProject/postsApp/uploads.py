@@ -0,0 +1,149 @@
+# postsApp/uploads.py
+# Upload em streaming das media dos posts: cada chunk é escrito diretamente
+# no storage das media (num temporário em posts/media/tmp/, no mesmo
+# filesystem) e entra no sha256 à medida que chega, por isso a memória usada
+# não depende do tamanho do ficheiro. No fim o ficheiro é movido (rename
+# atómico) para o nome endereçado pelo conteúdo (ver postsApp/storage.py).
+# Os limites de tamanho são verificados durante o upload e o tipo é
+# detetado pelos magic bytes (o content_type enviado pelo browser é ignorado).
+# Os metadados dos vídeos MP4/MOV são apagados antes do nome final (o sha256
+# é então recalculado).
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+
+from .media_processing import strip_video_metadata
+from .models import Media, MediaBlob
+from .storage import SNIFF_BYTES, sha256_of, sniff_media_type
+
+FIELD_NAME = 'media_files'
+
+
+def max_file_size():
+    return getattr(settings, 'POST_MEDIA_MAX_FILE_SIZE', 50 * 1024 * 1024)
+
+
+def max_post_size():
+    return getattr(settings, 'POST_MEDIA_MAX_POST_SIZE', 200 * 1024 * 1024)
+
+
+class StoredUploadedFile(UploadedFile):
+    """Ficheiro já gravado no storage; `name` é o caminho relativo a MEDIA_ROOT."""
+
+    def __init__(self, storage, name, size, sha256, media_type, content_type, original_name):
+        super().__init__(None, name=name, content_type=content_type, size=size)
+        self.storage = storage
+        self.sha256 = sha256
+        self.media_type = media_type
+        self.original_name = original_name
+
+    # UploadedFile limita o nome ao basename; aqui guarda-se o caminho completo
+    def _get_name(self):
+        return self._name
+
+    def _set_name(self, name):
+        self._name = name
+
+    name = property(_get_name, _set_name)
+
+    def open(self, mode='rb'):
+        self.file = self.storage.open(self.name, mode)
+        return self
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def delete(self):
+        """Apaga o ficheiro, exceto se já for usado por outra Media (conteúdo igual)."""
+        self.close()
+        if not MediaBlob.objects.filter(name=self.name, ref_count__gt=0).exists():
+            self.storage.delete(self.name)
+
+
+class StreamingMediaUploadHandler(FileUploadHandler):
+    """
+    Erros (ficheiro grande demais, tipo não suportado, ...) ficam em
+    request.upload_errors; os ficheiros válidos chegam a request.FILES
+    como StoredUploadedFile.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.field = Media._meta.get_field('file')
+        self.storage = self.field.storage
+        self.total_size = 0
+        self.rejected = False
+        request.upload_errors = []
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Content-Length já acima do limite: nenhum ficheiro é gravado (os
+        # campos normais, incluindo o token CSRF, continuam a ser lidos)
+        self.rejected = bool(content_length and content_length > max_post_size() + 1024 * 1024)
+        if self.rejected:
+            self.request.upload_errors.append("O upload excede o tamanho máximo permitido por post.")
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if field_name != FIELD_NAME or self.rejected:
+            raise SkipFile()
+
+        self.size = 0
+        self.sniffed = None
+        self.hash = hashlib.sha256()
+
+        self.stored_name = self.storage.temp_name()
+        path = self.storage.path(self.stored_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.destination = open(path, 'xb')
+
+    def _fail(self, message, stop=False):
+        self.request.upload_errors.append(message)
+        self._discard()
+        if stop:
+            raise StopUpload()
+        raise SkipFile()
+
+    def _discard(self):
+        self.destination.close()
+        self.storage.delete(self.stored_name)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.sniffed is None:
+            self.sniffed = sniff_media_type(raw_data[:SNIFF_BYTES])
+            if self.sniffed is None:
+                self._fail(f"{self.file_name}: tipo de ficheiro não suportado.")
+
+        self.size += len(raw_data)
+        self.total_size += len(raw_data)
+        if self.size > max_file_size():
+            self._fail(f"{self.file_name}: o ficheiro excede o tamanho máximo.")
+        if self.total_size > max_post_size():
+            self._fail("O upload excede o tamanho máximo permitido por post.", stop=True)
+
+        self.hash.update(raw_data)
+        self.destination.write(raw_data)
+        return None  # os outros handlers não recebem o chunk
+
+    def file_complete(self, file_size):
+        self.destination.close()
+        if self.sniffed is None:  # ficheiro vazio
+            self.storage.delete(self.stored_name)
+            self.request.upload_errors.append(f"{self.file_name}: ficheiro vazio.")
+            return None
+        media_type, mime = self.sniffed
+        sha256 = self.hash.hexdigest()
+        if mime in ('video/mp4', 'video/quicktime') and strip_video_metadata(self.storage.path(self.stored_name)):
+            with self.storage.open(self.stored_name) as f:
+                sha256 = sha256_of(f)
+        name = self.storage.promote(self.stored_name, sha256, mime)
+        return StoredUploadedFile(self.storage, name, self.size, sha256, media_type, mime, self.file_name)
+
+    def upload_interrupted(self):
+        if getattr(self, 'destination', None) and not self.destination.closed:
+            self._discard()
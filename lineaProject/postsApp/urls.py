@@ -6,9 +6,12 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.FeedView.as_view(), name='feed'),
     path('user/<str:username>/', views.UserPostsView.as_view(), name='user_posts'),
+    path('user/<str:username>/follow/', views.toggle_follow, name='follow'),
     path('create/', views.PostCreateView.as_view(), name='create'),
     path('<int:pk>/', views.PostDetailView.as_view(), name='detail'),
     path('<int:pk>/like/', views.toggle_like, name='like'),
     path('<int:pk>/comment/', views.add_comment, name='comment'),
     path('<int:pk>/delete/', views.PostDeleteView.as_view(), name='delete'),
+    path('notifications/', views.notification_list, name='notifications'),
+    path('notifications/read/', views.mark_notifications_read, name='notifications_read'),
 ]
@@ -4,37 +4,68 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.http import JsonResponse
-from .models import Post, Like, Comment, Media
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.contrib.auth import get_user_model
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+import json
+from .models import Post, Comment, Media, Follow, Notification
 from .forms import PostForm, CommentForm
+from .pagination import KeysetPaginationMixin
+from .comments import comment_threads
+from .timeline import timeline_page
+from . import media_processing
+from .uploads import StreamingMediaUploadHandler
+from . import likes, notifications
 
 # Create your views here.
 
 
-# FEED PRINCIPAL (posts mais recentes de todos)
+# FEED PRINCIPAL (timeline: posts de quem segues + os teus)
 @method_decorator(login_required, name='dispatch')
-class FeedView(ListView):
+class FeedView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = 'postsApp/feed.html'
     context_object_name = 'posts'
-    paginate_by = 10
+    page_size = 10
 
     def get_queryset(self):
-        # Mostra posts de todos os utilizadores (podes filtrar por quem segues depois)
-        return Post.objects.select_related('creator').prefetch_related('media', 'likes', 'comments')
+        # Queryset base para carregar os posts da página (ver postsApp/timeline.py)
+        # Os nº de likes/comentários vêm de Post.like_count/comment_count e o
+        # estado do like vem anotado (with_viewer_state)
+        return Post.objects.select_related('creator').prefetch_related('media') \
+            .with_viewer_state(self.request.user)
+
+    def paginate_keyset(self, queryset):
+        return timeline_page(
+            self.request.user, self.request.GET.get(self.cursor_param), self.page_size, posts=queryset
+        )
 
 
 
 # POSTS DE UM UTILIZADOR ESPECÍFICO
 @method_decorator(login_required, name='dispatch')
-class UserPostsView(ListView):
+class UserPostsView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = 'postsApp/user_posts.html'
     context_object_name = 'posts'
+    page_size = 10
 
     def get_queryset(self):
         username = self.kwargs.get('username')
-        return Post.objects.filter(creator__username=username).select_related('creator').prefetch_related('media')
+        return Post.objects.filter(creator__username=username).select_related('creator') \
+            .prefetch_related('media').with_viewer_state(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        posts = context['page'].object_list
+        if posts:
+            context['is_following'] = posts[0].is_following_creator  # já anotado
+        else:
+            context['is_following'] = Follow.objects.filter(
+                follower=self.request.user, followed__username=self.kwargs.get('username')
+            ).exists()
+        return context
 
 
 
@@ -44,12 +75,17 @@ class PostDetailView(DetailView):
     model = Post
     template_name = 'postsApp/post_detail.html'
     context_object_name = 'post'
+    comments_page_size = 20
+
+    def get_queryset(self):
+        return Post.objects.select_related('creator').with_viewer_state(self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('user')
-        context['liked'] = Like.objects.filter(user=self.request.user, post=self.object).exists()
+        # Threads de comentários numa query, paginadas por comentário de topo
+        context['comments'] = comment_threads(self.object, self.request.GET.get('comments'), self.comments_page_size)
+        context['liked'] = self.object.liked_by_me
         return context
 
 
@@ -62,40 +98,81 @@ class PostCreateView(CreateView):
     template_name = 'postsApp/post_form.html'
     success_url = reverse_lazy('posts:feed')
 
+    # Os upload handlers têm de ser trocados antes de o CSRF ler o request.POST,
+    # por isso a verificação CSRF é feita depois (em _dispatch). Os ficheiros
+    # são gravados antes dessa verificação: no fim do pedido, os que não
+    # ficaram ligados a uma Media (CSRF inválido, formulário inválido, erro)
+    # são apagados.
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        request.upload_handlers = [StreamingMediaUploadHandler(request)]
+        try:
+            return self._dispatch(request, *args, **kwargs)
+        finally:
+            self._discard_unused_files(request)
+
+    def _discard_unused_files(self, request):
+        if not hasattr(request, '_files'):  # o corpo não chegou a ser lido
+            return
+        for f in request.FILES.getlist('media_files'):
+            f.delete()  # não apaga se já for usado por uma Media
+
+    @method_decorator(csrf_protect)
+    def _dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
     def form_valid(self, form):
+        # Os ficheiros já foram gravados durante o upload (postsApp/uploads.py)
+        files = self.request.FILES.getlist('media_files')
+        errors = getattr(self.request, 'upload_errors', [])
+        if errors:
+            for error in errors:
+                form.add_error(None, error)
+            return self.form_invalid(form)
+
         # Define o criador do post
         form.instance.creator = self.request.user
         response = super().form_valid(form)
 
         # Processa múltiplos arquivos enviados
-        files = self.request.FILES.getlist('media_files')
-        for f in files:
-            Media.objects.create(
+        # (as versões redimensionadas são geradas em background)
+        media_ids = []
+        for order, f in enumerate(files):
+            media = Media.objects.create(
                 post=self.object,
-                file=f,  # ou file=f se o campo Media for FileField/ImageField
-                media_type=form.cleaned_data['content_type']
+                file=f.name,  # caminho já gravado no storage (sem nova cópia)
+                media_type=f.media_type,  # detetado pelos magic bytes
+                order=order
             )
+            media_ids.append(media.id)
+        media_processing.enqueue(media_ids)
 
         messages.success(self.request, "Post criado com sucesso!")
         return response
     
 
 
-# LIKE / UNLIKE POST (AJAX)
+# LIKE / UNLIKE POST
+# PUT = like, DELETE = unlike (idempotentes, JSON); POST alterna (formulários)
 @login_required
+@require_http_methods(['POST', 'PUT', 'DELETE'])
 def toggle_like(request, pk):
-    post = get_object_or_404(Post, pk=pk)
-    like, created = Like.objects.get_or_create(user=request.user, post=post)
-
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
+    try:
+        if request.method == 'DELETE':
+            _, like_count = likes.unlike(request.user.pk, pk)
+            liked = False
+        else:
+            changed, like_count = likes.like(request.user.pk, pk)
+            liked = True
+            if request.method == 'POST' and not changed:  # já tinha like: alterna
+                _, like_count = likes.unlike(request.user.pk, pk)
+                liked = False
+    except likes.PostNotFound:
+        raise Http404("Post não encontrado.")
 
     # Retorna resposta JSON (para usar com JS/AJAX)
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        return JsonResponse({'liked': liked, 'likes_count': post.likes.count()})
+    if request.method != 'POST' or request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'liked': liked, 'likes_count': like_count})
     return redirect('posts:detail', pk=pk)
 
 
@@ -107,11 +184,17 @@ def add_comment(request, pk):
 
     if request.method == 'POST':
         form = CommentForm(request.POST)
+        # Resposta a outro comentário (do mesmo post)
+        parent_id = request.POST.get('parent')
+        if parent_id and not parent_id.isdigit():
+            return HttpResponseBadRequest("Comentário inválido.")
+        parent = get_object_or_404(Comment, pk=parent_id, post=post) if parent_id else None
         if form.is_valid():
             Comment.objects.create(
                 post=post,
                 user=request.user,
-                text=form.cleaned_data['text']
+                text=form.cleaned_data['text'],
+                parent=parent
             )
             messages.success(request, "Comentário adicionado!")
         else:
@@ -120,6 +203,56 @@ def add_comment(request, pk):
 
 
 
+# SEGUIR / DEIXAR DE SEGUIR UM UTILIZADOR
+@login_required
+def toggle_follow(request, username):
+    followed = get_object_or_404(get_user_model(), username=username)
+
+    if request.method == 'POST' and followed != request.user:
+        follow = Follow.objects.filter(follower=request.user, followed=followed).first()
+        if follow:
+            follow.delete()
+            messages.success(request, f"Deixaste de seguir {followed.username}.")
+        else:
+            Follow.objects.create(follower=request.user, followed=followed)
+            messages.success(request, f"Estás a seguir {followed.username}.")
+    return redirect('posts:user_posts', username=username)
+
+
+
+# NOTIFICAÇÕES (JSON; as novas chegam em tempo real por ws/notifications/)
+@login_required
+@require_GET
+def notification_list(request):
+    latest = Notification.objects.filter(recipient=request.user).select_related('sender')[:20]
+    return JsonResponse({
+        'unread': request.user.unread_notification_count,
+        'notifications': [notifications.serialize(n) for n in latest],
+    })
+
+
+# MARCAR NOTIFICAÇÕES COMO LIDAS (em lote: {"ids": [...]}; sem ids marca todas)
+@login_required
+@require_POST
+def mark_notifications_read(request):
+    if request.content_type == 'application/json':
+        try:
+            ids = json.loads(request.body or '{}').get('ids')
+        except (ValueError, AttributeError):
+            return JsonResponse({'error': 'JSON inválido.'}, status=400)
+    else:
+        ids = request.POST.getlist('ids') or None
+    if ids is not None:
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'ids inválidos.'}, status=400)
+
+    updated = notifications.mark_read(request.user.pk, ids)
+    return JsonResponse({'updated': updated, 'unread': notifications.unread_count(request.user.pk)})
+
+
+
 # APAGAR POST (apenas o autor)
 @method_decorator(login_required, name='dispatch')
 class PostDeleteView(DeleteView):